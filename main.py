@@ -1,5 +1,9 @@
 #!/usr/bin/python3
+import sys
 
 from trash_dash import run
+from trash_dash.cli import main
 
+if len(sys.argv) > 1:
+    sys.exit(main(sys.argv[1:]))
 run()
@@ -0,0 +1,99 @@
+"""Tests for two running instances sharing a module's data file"""
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from trash_dash import data
+from trash_dash.modules import todo
+from trash_dash.modules.todo import Todo
+
+
+class TwoInstancesTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "todo.data.json")
+        for patcher in (
+            patch.object(
+                data,
+                "_get_path",
+                lambda name, extension="json": os.path.join(
+                    directory.name, f"{name}.data.{extension}"
+                ),
+            ),
+            patch.object(data, "_get_storage_name", lambda name: "json"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def open_todo() -> Todo:
+        """Opens the tasks like another running instance of the app would"""
+        with patch.dict(data._handles, clear=True), patch.object(todo, "_todo", None):
+            return Todo()
+
+    def read_file(self) -> dict:
+        with open(self.path) as f:
+            return json.load(f)["_default"]
+
+    def test_renumbered_tasks_are_indexed_again(self):
+        a = self.open_todo()
+        a.add_item("first", "todo")
+        a.add_item("second", "todo")
+        a.data.flush()
+        b = self.open_todo()
+
+        a.add_item("from A", "todo")
+        b.import_items([{"text": "from B"}])
+        a.data.flush()
+
+        self.assertEqual(self.read_file()["3"]["text"], "from B")
+        self.assertEqual(self.read_file()["4"]["text"], "from A")
+        self.assertEqual(
+            [(task["id"], task["text"]) for task in a.tasks],
+            [("1", "first"), ("2", "second"), ("3", "from B"), ("4", "from A")],
+        )
+        a.delete_item(4)
+        a.data.flush()
+        self.assertEqual(
+            [doc["text"] for doc in self.read_file().values()],
+            ["first", "second", "from B"],
+        )
+
+    def test_changes_of_another_instance_are_read(self):
+        a = self.open_todo()
+        a.add_item("from A", "todo")
+        a.data.flush()
+        self.assertFalse(a.data.check_changes())
+        b = self.open_todo()
+
+        b.move_item(1, "done")
+        b.add_item("from B", "doing")
+        b.data.flush()
+
+        self.assertTrue(a.data.check_changes())
+        self.assertEqual([task["text"] for task in a.get_stage("done")], ["from A"])
+        self.assertEqual([task["text"] for task in a.get_stage("doing")], ["from B"])
+        self.assertFalse(a.data.check_changes())
+
+    def test_pending_writes_are_merged_when_checking(self):
+        a = self.open_todo()
+        b = self.open_todo()
+        a.add_item("from A", "todo")
+        b.add_item("from B", "todo")
+        b.data.flush()
+
+        self.assertTrue(a.data.check_changes())
+        self.assertEqual(
+            sorted(doc["text"] for doc in self.read_file().values()),
+            ["from A", "from B"],
+        )
+        self.assertEqual([task["text"] for task in a.todo], ["from B", "from A"])
+        b.data.check_changes()
+        self.assertEqual([task["text"] for task in b.todo], ["from B", "from A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Tests for atomic file writes"""
+import os
+import stat
+import unittest
+from tempfile import TemporaryDirectory
+
+from trash_dash.files import write_atomic
+
+
+class WriteAtomicTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "settings.toml")
+
+    def get_mode(self) -> int:
+        return stat.S_IMODE(os.stat(self.path).st_mode)
+
+    def test_keeps_permissions(self):
+        write_atomic(self.path, "a = 1\n")
+        os.chmod(self.path, 0o640)
+        write_atomic(self.path, b"a = 2\n")
+        self.assertEqual(self.get_mode(), 0o640)
+
+    def test_new_files_use_the_umask(self):
+        write_atomic(self.path, "a = 1\n")
+        with open(os.path.join(os.path.dirname(self.path), "new"), "w") as f:
+            expected = stat.S_IMODE(os.fstat(f.fileno()).st_mode)
+        self.assertEqual(self.get_mode(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
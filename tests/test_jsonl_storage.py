@@ -0,0 +1,34 @@
+"""Tests for the append-only storage shared by two running instances"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from trash_dash.jsonl_storage import JSONLinesStorage
+
+
+class CompactTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "todo.data.jsonl")
+
+    def test_keeps_lines_appended_by_another_instance(self):
+        a = JSONLinesStorage(self.path)
+        a.write({"_default": {"1": {"text": "from A"}}})
+        b = JSONLinesStorage(self.path)
+        b.read()
+        b.write({"_default": {"1": {"text": "from A"}, "2": {"text": "from B"}}})
+
+        a.write({"_default": {"1": {"text": "edited by A"}}})
+        a.compact()
+
+        self.assertEqual(
+            JSONLinesStorage(self.path).read(),
+            {"_default": {"1": {"text": "edited by A"}, "2": {"text": "from B"}}},
+        )
+        with open(self.path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
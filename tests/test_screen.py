@@ -0,0 +1,42 @@
+"""Tests for screens kept between two visits"""
+import unittest
+
+from trash_dash import _get_module_screen, events, screen
+
+
+class _Meta:
+    name = "screen_test"
+    display_name = "Screen test"
+
+
+class _Module:
+    meta = _Meta
+    displayed = 0
+
+    @classmethod
+    def display(cls):
+        cls.displayed += 1
+        events.on("screen_test.event_loop", lambda: None)
+        return "Hello"
+
+    @staticmethod
+    def header():
+        return None
+
+
+class ReleaseTest(unittest.TestCase):
+    def tearDown(self):
+        screen.release_screen(_Meta.name)
+
+    def test_released_screens_register_their_handlers_again(self):
+        _get_module_screen(_Module)
+        screen.release_screen(_Meta.name)
+        self.assertNotIn("screen_test.event_loop", events._event_handlers)
+
+        _get_module_screen(_Module)
+        self.assertIn("screen_test.event_loop", events._event_handlers)
+        self.assertEqual(_Module.displayed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for noticing changes made to settings.toml while the app is running"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import toml
+
+from trash_dash import settings
+
+
+class CheckChangesTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "settings.toml")
+        with open(path, "w") as f:
+            toml.dump(
+                {"app_name": "TrashDash", "module": {"test": {"name": "test"}}}, f
+            )
+        for patcher in (
+            patch.object(settings, "PATH", path),
+            patch.object(settings, "_cache", None),
+            patch.object(settings, "_seen", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.path = path
+        settings.check_changes()
+
+    def test_own_writes_are_not_changes(self):
+        settings._Settings("test").set("ip", "127.0.0.1")
+        settings.flush_settings()
+        self.assertEqual(settings.check_changes(), (set(), set()))
+        self.assertEqual(settings._Settings("test").get("ip"), "127.0.0.1")
+
+    def test_edits_before_own_writes_are_changes(self):
+        with open(self.path, "w") as f:
+            toml.dump({"app_name": "Edited", "module": {"test": {"name": "test"}}}, f)
+        settings._Settings("test").set("ip", "127.0.0.1")
+        settings.flush_settings()
+        self.assertEqual(settings.check_changes(), ({"app_name"}, set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Tests for the SQLite storage"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from tinydb import Query, TinyDB
+from tinydb.storages import MemoryStorage
+
+from trash_dash.sqlite_storage import SQLiteStorage, compile_query
+
+# Documents with every JSON type in the compared fields
+DOCS = [
+    {"stage": "todo", "n": 1},
+    {"stage": "done", "n": 2.5},
+    {"stage": None, "n": None},
+    {"stage": ["todo"], "n": [1]},
+    {"stage": {"a": "todo"}, "n": {"a": 1}},
+    {"stage": "1", "n": True},
+    {"stage": '["todo"]', "n": False},
+    {"stage": 1, "n": "1"},
+    {},
+    {"nested": {"stage": "todo"}},
+    {"nested": "todo"},
+]
+VALUES = ("todo", "1", '["todo"]', 1, 2.5, 0, True)
+
+
+class TwoInstancesTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "todo.data.db")
+
+    def open_storage(self) -> SQLiteStorage:
+        storage = SQLiteStorage(self.path)
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_documents_inserted_by_both_get_new_ids(self):
+        a = self.open_storage()
+        a_data = a.read() or {}
+        b = self.open_storage()
+        b.read()
+        b.write({"_default": {"1": {"text": "from B"}}})
+        self.assertTrue(a.changed())
+
+        a_data["_default"] = {"1": {"text": "from A"}}
+        a.write(a_data)
+
+        expected = {"_default": {"1": {"text": "from B"}, "2": {"text": "from A"}}}
+        self.assertEqual(a_data, expected)
+        self.assertEqual(self.open_storage().read(), expected)
+        self.assertEqual(a.merges, 1)
+        self.assertFalse(a.changed())
+
+    def test_updates_keep_their_ids(self):
+        a = self.open_storage()
+        a.write({"_default": {"1": {"text": "first"}}})
+        a_data = a.read() or {}
+        a_data["_default"]["1"] = {"text": "edited"}
+        a.write(a_data)
+
+        self.assertEqual(
+            self.open_storage().read(), {"_default": {"1": {"text": "edited"}}}
+        )
+        self.assertEqual(a.merges, 0)
+
+
+class QueryParityTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = SQLiteStorage(os.path.join(directory.name, "test.data.db"))
+        self.addCleanup(self.storage.close)
+        tables = {"_default": {str(i): doc for i, doc in enumerate(DOCS, 1)}}
+        self.storage.write(tables)
+        self.db = TinyDB(storage=MemoryStorage)
+        self.db.storage.write(tables)
+
+    def assert_same_results(self, query):
+        try:
+            expected = [doc.doc_id for doc in self.db.search(query)]
+        except TypeError:
+            # Python can't compare the types, so there's nothing to compare to
+            return
+        compiled = compile_query(query._hash)
+        self.assertIsNotNone(compiled, query)
+        results = self.storage.search("_default", *compiled)
+        self.assertEqual([doc_id for doc_id, _ in results], expected, query)
+
+    def test_comparisons(self):
+        for path in (Query().stage, Query().n, Query().nested.stage):
+            for value in VALUES:
+                for query in (
+                    path == value,
+                    path != value,
+                    path < value,
+                    path <= value,
+                    path > value,
+                    path >= value,
+                ):
+                    with self.subTest(query=query):
+                        self.assert_same_results(query)
+
+    def test_one_of(self):
+        for value in (("todo", "done"), (1, "1"), ('["todo"]',), (True, 2.5), ()):
+            with self.subTest(value=value):
+                self.assert_same_results(Query().stage.one_of(value))
+                self.assert_same_results(Query().n.one_of(value))
+
+    def test_combined(self):
+        stage, n = Query().stage, Query().n
+        for query in (
+            stage.exists(),
+            ~stage.exists(),
+            ~(stage == "todo"),
+            ~(n != 1),
+            (stage == "todo") | (n == True),  # noqa: E712
+            (stage != "todo") & (n >= 0),
+            ~((stage == "done") | n.one_of((1, 2.5))),
+        ):
+            with self.subTest(query=query):
+                self.assert_same_results(query)
+
+
+if __name__ == "__main__":
+    unittest.main()
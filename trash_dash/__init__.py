@@ -1,25 +1,59 @@
 import os
 import platform
-from typing import Optional
+from typing import Any, Optional
 
-from blessed import Terminal, keyboard
+from blessed import Terminal
 from rich import print
 from rich.align import Align
+from rich.layout import Layout
 from rich.live import Live
 from rich.markup import escape
 
+from trash_dash import data, main_loop, renderer, scheduler, screen
 from trash_dash.all_modules import all_modules
 from trash_dash.body import console
 from trash_dash.cards import cards as _cards
-from trash_dash.events import off, on
+from trash_dash.cards import reload_cards
+from trash_dash.events import dispatch_posted, emit, off, on
 from trash_dash.main_screen import create_screen
+from trash_dash.memo import invalidate, memoized
 from trash_dash.modules import modules
-from trash_dash.screen import Screen, screens
+from trash_dash.screen import Screen
+from trash_dash.settings import check_changes
 
 term = Terminal()
 handle_keystrokes = True
 
 
+def _get_module_screen(module: Any) -> Screen:
+    """Gets the screen of a module, reusing the kept one"""
+    module_screen = screen.get_screen(module.meta.name)
+    if module_screen is not None and isinstance(
+        module_screen.body_layout.renderable, Layout
+    ):
+        # The module updates its layout itself
+        return module_screen
+    body = memoized(module.meta.name, "display", module.display)
+    head = memoized(module.meta.name, "header", module.header)
+    if module_screen is None:
+        module_screen = Screen(module.meta.name)
+    if not body:
+        module_screen.render_header(
+            Align(
+                "[b]This module can't be displayed on its own",
+                "center",
+                vertical="middle",
+            )
+        )
+        module_screen.render_body(
+            Align("Press ESC to exit", "center", vertical="middle")
+        )
+        return module_screen
+    module_screen.render_header(head or Align(f"[b]{escape(module.meta.display_name)}"))
+    module_screen.render_body(body)
+    return module_screen
+
+
 def _show_more(card_index: int) -> Optional[Screen]:
     try:
         card_item = modules.get(_cards[card_index])
@@ -29,32 +63,13 @@ def _show_more(card_index: int) -> Optional[Screen]:
         return None
     if not (hasattr(card_item, "display") and bool(card_item.display)):  # type: ignore
         return None
-    x = card_item.display()  # type: ignore
-    y = card_item.header()
-    module_screen = Screen(card_item.meta.name)
     try:
-        if not x:
-            module_screen.render_header(
-                Align(
-                    "[b]This module can't be displayed on its own",
-                    "center",
-                    vertical="middle",
-                )
-            )
-            module_screen.render_body(
-                Align("Press ESC to exit", "center", vertical="middle")
-            )
-            return module_screen
-        module_screen.render_header(
-            y or Align(f"[b]{escape(card_item.meta.display_name)}")
-        )
-        module_screen.render_body(x)
-        return module_screen
+        return _get_module_screen(card_item)
     except (IndexError, TypeError):
         return None
 
 
-current_screen: Screen = create_screen()
+current_screen: Screen
 
 
 def run():
@@ -66,106 +81,139 @@ def run():
         print("[red b]The console window is too small for the app to run!")
         return
 
+    # Start fetching in the background before the first paint
+    scheduler.start(modules.values())
+    current_screen = create_screen()
+
     try:
         with term.fullscreen(), term.cbreak():
-            with Live(screens["main"].layout, console=console, screen=True) as live:
-                pressed_key: Optional[keyboard.Keystroke] = None
+            with Live(
+                screen.screens["main"].layout,
+                console=console,
+                screen=True,
+                auto_refresh=False,
+            ) as live:
+                renderer.start(live, screen.screens["main"].layout)
 
-                def render_module(module_name: str):
+                def show(new_screen: Screen):
+                    """Replaces the current screen"""
                     global current_screen
-                    module = modules.get(module_name)
-                    if not module:
-                        return
-                    body = module.display()
-                    head = module.header()
-                    module_screen = Screen(module.meta.name, header_renderable=head)
-                    if not body:
-                        module_screen.render_header(
-                            Align(
-                                "[b]This module can't be displayed on its own",
-                                "center",
-                                vertical="middle",
-                            )
-                        )
-                        module_screen.render_body(
-                            Align("Press ESC to exit", "center", vertical="middle")
-                        )
-                        live.update(module_screen.layout)
-                        off(f"{current_screen.name}.update")
-                        current_screen.destroy()
-                        current_screen = module_screen
-                        on(f"{current_screen.name}.update", live.update)
+                    renderer.request(new_screen.layout)
+                    if new_screen is current_screen:
                         return
-                    module_screen.render_header(
-                        head or Align(f"[b]{escape(module.meta.display_name)}")
-                    )
-                    module_screen.render_body(body)
-                    live.update(module_screen.layout)
-                    current_screen.destroy()
-                    current_screen = module_screen
+                    # The screen is kept, and destroyed once it is released
+                    off(f"{current_screen.name}.update")
+                    current_screen = new_screen
+                    on(f"{current_screen.name}.update", renderer.request)
+                    current_screen.show()
+
+                def render_module(module_name: str):
+                    module = modules.get(module_name)
+                    if module:
+                        show(_get_module_screen(module))
 
                 def seize_keystrokes(b: bool = True):
                     """Allows modules to completely take over the keyboard (except ESC)"""
                     global handle_keystrokes
                     handle_keystrokes = not b
 
-                on(f"{current_screen.name}.update", live.update)
+                def refreshed(module_name: str):
+                    """Lets the current screen know that a module's data was fetched"""
+                    invalidate(module_name)
+                    emit(f"{current_screen.name}.refreshed", module_name)
+
+                def settings_changed():
+                    """Applies changes made to settings.toml while the app is running"""
+                    changed, changed_modules = check_changes()
+                    if not (changed or changed_modules):
+                        return
+                    changed_cards = reload_cards() if "cards" in changed else []
+                    for module_name in changed_modules:
+                        invalidate(module_name)
+                        # Kept screens of the module are rendered again when shown
+                        screen.release_screen(module_name)
+                        module = modules.get(module_name)
+                        if module:
+                            scheduler.refresh(module)
+                    if current_screen.name in changed_modules:
+                        render_module(current_screen.name)
+                    else:
+                        emit(
+                            f"{current_screen.name}.settings_changed",
+                            changed,
+                            changed_modules,
+                            changed_cards,
+                        )
+
+                check_changes()
+                on(f"{current_screen.name}.update", renderer.request)
                 on("render_module", render_module)
                 on("seize_keystrokes", seize_keystrokes)
+                on("refreshed", refreshed)
 
-                while True:
+                running = True
+                while running:
+                    dispatch_posted()
+                    settings_changed()
+                    # Data written by other running instances is shown like fetched data
+                    for module_name in data.check_changes():
+                        refreshed(module_name)
                     current_screen.event_loop()
-                    pressed_key = term.inkey(timeout=1)
-                    if handle_keystrokes and pressed_key == "q":
-                        break
-                    elif pressed_key.is_sequence and pressed_key.code == 361:
-                        # Re-render the main screen when <ESC> is pressed
-                        x = create_screen()
-                        live.update(x.layout)
-                        current_screen.destroy()
-                        current_screen = x
-                    elif handle_keystrokes and pressed_key == "s":
-                        start_keyword = "start"
-                        if platform.system().lower() == "linux":
-                            start_keyword = "xdg-open"
-                        elif platform.system().lower() == "darwin":
-                            start_keyword = "open"
-                        os.system(  # noqa: S605
-                            start_keyword
-                            + " "
-                            + os.path.abspath(
-                                os.path.join(
-                                    os.path.dirname(os.path.abspath(__file__)),
-                                    "data/settings.toml",
+                    renderer.render()
+                    # Sleep until a key is pressed or something happens in the background
+                    pressed_keys = main_loop.wait(term, main_loop.get_timeout())
+                    for pressed_key in pressed_keys:
+                        if handle_keystrokes and pressed_key == "q":
+                            running = False
+                            break
+                        elif pressed_key.is_sequence and pressed_key.code == 361:
+                            # Go back to the main screen when <ESC> is pressed
+                            show(screen.get_screen("main") or create_screen())
+                        elif handle_keystrokes and pressed_key == "s":
+                            start_keyword = "start"
+                            if platform.system().lower() == "linux":
+                                start_keyword = "xdg-open"
+                            elif platform.system().lower() == "darwin":
+                                start_keyword = "open"
+                            os.system(  # noqa: S605
+                                start_keyword
+                                + " "
+                                + os.path.abspath(
+                                    os.path.join(
+                                        os.path.dirname(os.path.abspath(__file__)),
+                                        "data/settings.toml",
+                                    )
                                 )
                             )
-                        )
-                    elif (
-                        handle_keystrokes
-                        and current_screen.name == "main"
-                        and pressed_key
-                        in [
-                            "1",
-                            "2",
-                            "3",
-                        ]
-                    ):
-                        card_index = int(pressed_key) - 1
-                        mod = _show_more(card_index)
-                        if mod:
-                            live.update(mod.layout)
-                            current_screen.destroy()
-                            current_screen = mod
-                    elif handle_keystrokes and pressed_key == "a":
-                        x = all_modules()
-                        live.update(x.layout)
-                        current_screen.destroy()
-                        current_screen = x
-                    else:
-                        # Pass the keypress to the screen
-                        current_screen.keystroke(pressed_key)
+                        elif (
+                            handle_keystrokes
+                            and current_screen.name == "main"
+                            and pressed_key
+                            in [
+                                "1",
+                                "2",
+                                "3",
+                            ]
+                        ):
+                            card_index = int(pressed_key) - 1
+                            mod = _show_more(card_index)
+                            if mod:
+                                show(mod)
+                        elif handle_keystrokes and pressed_key == "a":
+                            show(screen.get_screen("all_modules") or all_modules())
+                        else:
+                            # Pass the keypress to the screen
+                            current_screen.keystroke(pressed_key)
+                        # Let the screen catch up before the next key, like after a tick
+                        current_screen.event_loop()
+                    if pressed_keys:
+                        # Screens change their layouts in place when keys are pressed
+                        renderer.request(current_screen.layout)
                 off(f"{current_screen.name}.update")
-                current_screen.destroy()
+                screen.release_screens()
+                renderer.stop()
         print("[b]Exiting!")
     except KeyboardInterrupt:
         pass
+    finally:
+        scheduler.stop()
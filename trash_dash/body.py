@@ -1,6 +1,6 @@
 """Body of the main screen"""
 from collections.abc import Callable
-from typing import Tuple
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Union
 
 from rich.align import Align
 from rich.columns import Columns
@@ -9,56 +9,98 @@ from rich.padding import Padding
 
 from trash_dash import cards
 from trash_dash.console import console
-from trash_dash.date_time_section import date_time_section
+from trash_dash.date_time_section import date_time_section, get_minute
 from trash_dash.events import emit
+from trash_dash.modules import modules
 from trash_dash.modules.today import TodayModule
 
 
-def body() -> Tuple[RenderableType, Callable, Callable]:
-    """Render the body of the main page"""
-    today = TodayModule.card()
-    one, destroy_one = cards.one()
-    two, destroy_two = cards.two()
-    three, destroy_three = cards.three()
+def _today() -> Tuple[RenderableType, Callable]:
+    """Renders the Today card"""
+    return TodayModule.card(), lambda: emit("today.destroy")
+
+
+# Type: part: function rendering the part of the body
+_parts: Dict[Union[str, int], Callable[[], Tuple[RenderableType, Callable]]] = {
+    "today": _today,
+    0: cards.one,
+    1: cards.two,
+    2: cards.three,
+}
+
+
+def body() -> Tuple[RenderableType, Callable, Callable, Callable]:
+    """
+    Render the body of the main page
+
+    :return: The body, a function destroying it, a function returning the body when it
+    changed (or None when it didn't), and a function rendering parts of it again
+    """
+    # Type: part: (renderable, destroy)
+    rendered = {part: render() for part, render in _parts.items()}
+    # Type: {"dirty": the body must be laid out again, "minute": shown minute, "width": console width}
+    state: Dict[str, Any] = {
+        "dirty": True,
+        "minute": get_minute(),
+        "width": console.width,
+    }
+    date_time = date_time_section()
 
     def destroy():
-        emit("today.destroy")
-        destroy_one()
-        destroy_two()
-        destroy_three()
+        for _, destroy_part in rendered.values():
+            destroy_part()
+
+    def reload(module_names: Iterable[str] = (), card_indexes: Iterable[int] = ()):
+        """Renders the parts showing the modules, and the cards at the indexes again"""
+        parts: Set[Union[str, int]] = set(card_indexes)
+        for name in module_names:
+            parts.update(cards.get_card_indexes(name))
+            module = modules.get(name)
+            if module and module.meta.allow_today:
+                parts.add("today")
+        for part in parts & rendered.keys():
+            rendered[part][1]()
+            rendered[part] = _parts[part]()
+            state["dirty"] = True
 
-    def update():
+    def columns():
+        return Padding(
+            Columns(
+                [
+                    rendered["today"][0],
+                    RenderGroup(date_time, Padding(rendered[0][0], (2, 0))),
+                    RenderGroup(rendered[1][0], Padding(rendered[2][0], (2, 0))),
+                ],
+                width=(console.width // 3) - 3,
+            ),
+            (1, 3),
+        )
+
+    def update() -> Optional[RenderableType]:
+        nonlocal date_time
+        minute = get_minute()
+        if minute != state["minute"]:
+            state["minute"] = minute
+            date_time = date_time_section()
+            state["dirty"] = True
+        if console.width != state["width"]:
+            state["width"] = console.width
+            state["dirty"] = True
+        if not state["dirty"]:
+            return None
+        state["dirty"] = False
         return RenderGroup(
             Align("Press [b]a[/b] to view all modules", "center"),
             Align("Press [b]ESC[/b] to return back to the main screen", "center"),
-            Padding(
-                Columns(
-                    [
-                        today,
-                        RenderGroup(date_time_section(), Padding(one, (2, 0))),
-                        RenderGroup(two, Padding(three, (2, 0))),
-                    ],
-                    width=(console.width // 3) - 3,
-                ),
-                (1, 3),
-            ),
+            columns(),
         )
 
     return (
         RenderGroup(
             Align("Press [b]a[/b] to view all modules", "center"),
-            Padding(
-                Columns(
-                    [
-                        today,
-                        RenderGroup(date_time_section(), Padding(one, (2, 0))),
-                        RenderGroup(two, Padding(three, (2, 0))),
-                    ],
-                    width=(console.width // 3) - 3,
-                ),
-                (1, 3),
-            ),
+            columns(),
         ),
         destroy,
         update,
+        reload,
     )
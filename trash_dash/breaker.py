@@ -0,0 +1,103 @@
+"""
+Circuit breakers for upstream hosts
+
+Each host has a breaker that tracks its recent requests. Failed requests, and requests
+slower than ``LATENCY_BUDGET``, count as failures. After ``FAILURE_THRESHOLD`` failures
+in the last ``WINDOW`` requests the circuit opens, and requests to the host fail right
+away. After ``RESET_TIMEOUT`` seconds, one trial request is let through: if it succeeds
+the circuit closes, otherwise it opens again.
+"""
+from collections import deque
+from threading import Lock
+from time import monotonic
+from typing import Deque, Dict
+
+from requests import RequestException
+
+# Number of recent requests tracked
+WINDOW = 10
+# Number of failures in the window that open the circuit
+FAILURE_THRESHOLD = 3
+# Seconds before a trial request is sent to an open circuit
+RESET_TIMEOUT = 60
+# Requests slower than this many seconds count as failures
+LATENCY_BUDGET = 5
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RequestException):
+    """Raised when a request is sent to a host whose circuit is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, host: str):
+        """
+        Tracks the requests sent to a host
+
+        :param host: The host, used in error messages
+        """
+        self.host = host
+        self.state = CLOSED
+        # Type: [request succeeded]
+        self.__results: Deque[bool] = deque(maxlen=WINDOW)
+        self.__opened_at = 0.0
+        self.__lock = Lock()
+
+    def allow(self) -> bool:
+        """Checks if a request can be sent, and lets one trial request through"""
+        with self.__lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and monotonic() - self.__opened_at >= RESET_TIMEOUT:
+                self.state = HALF_OPEN
+                return True
+            # Only the trial request is let through while the circuit is half-open
+            return False
+
+    def check(self) -> None:
+        """Raises ``CircuitOpenError`` if a request can't be sent"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit to {self.host} is open")
+
+    def record(self, ok: bool, latency: float) -> None:
+        """
+        Records the result of a request
+
+        :param ok: If the request succeeded
+        :param latency: Seconds the request took
+        """
+        ok = ok and latency <= LATENCY_BUDGET
+        with self.__lock:
+            if self.state == HALF_OPEN:
+                self.__results.clear()
+                if ok:
+                    self.state = CLOSED
+                else:
+                    self.__open()
+                return
+            if self.state == OPEN:
+                return
+            self.__results.append(ok)
+            if self.__results.count(False) >= FAILURE_THRESHOLD:
+                self.__open()
+
+    def __open(self) -> None:
+        """Opens the circuit"""
+        self.state = OPEN
+        self.__opened_at = monotonic()
+        self.__results.clear()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Gets the breaker of a host, creating it if needed"""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
@@ -0,0 +1,256 @@
+"""
+Caches data fetched by modules
+
+Cached values are stored in the module's ``Data``. Once a value is older than the
+module's TTL, the old value is still returned while it is refreshed in the background.
+Failed fetches are remembered for ``NEGATIVE_TTL`` seconds, so they aren't retried on
+every render. Every time a value is fetched, a ``refreshed`` event is posted with the
+name of the module.
+
+Fetched values can be projected, so that only the fields the module renders are stored.
+"""
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from functools import wraps
+from math import floor
+from threading import Thread, local
+from time import time
+from typing import Any, DefaultDict, Dict, Optional, Set, Tuple, Union
+
+from requests import RequestException
+from tinydb import Query
+
+from trash_dash import singleflight
+from trash_dash.breaker import RESET_TIMEOUT
+from trash_dash.data import Data
+from trash_dash.events import post
+from trash_dash.settings import get_settings
+
+# Default seconds a cached value is fresh for, can be changed with ``cache_ttl``
+DEFAULT_TTL = 86400
+# Seconds a failed fetch is remembered for. A host whose circuit opened lets a trial
+# request through after as long, so it is retried as soon as the breaker allows it
+NEGATIVE_TTL = RESET_TIMEOUT
+# Fields of the cached documents that are searched by
+INDEXES = ("key", "cache_time")
+
+# When False, values that aren't cached are fetched in the background, and ``get``
+# returns the default right away
+blocking = True
+
+# Type: module_name: {"hit" | "stale" | "miss" | "negative" | "error": count}
+stats: DefaultDict[str, Counter] = defaultdict(Counter)
+
+# The fields of a value to keep. Each field is a key, or a dict of key: projection of
+# the key's value. e.g. ``("title", {"author": ("name",)})``
+Projection = Tuple[Union[str, Dict[str, "Projection"]], ...]
+
+_local = local()
+# Names of the modules that were last served expired values
+_stale_modules: Set[str] = set()
+
+
+@contextmanager
+def fetching():
+    """Fetch values synchronously in this thread. Used by background workers"""
+    _local.fetching = True
+    try:
+        yield
+    finally:
+        _local.fetching = False
+
+
+def _is_fetching() -> bool:
+    """Checks if the current thread is a background worker"""
+    return getattr(_local, "fetching", False)
+
+
+def is_stale(module_name: str) -> bool:
+    """Checks if the last value served to a module had expired, e.g. because its upstream is down"""
+    return module_name in _stale_modules
+
+
+def is_blocking() -> bool:
+    """Checks if values that aren't cached should be fetched in the current thread"""
+    return blocking or _is_fetching()
+
+
+def get_ttl(module_name: str, default: int = DEFAULT_TTL) -> int:
+    """Gets the TTL of a module from its ``cache_ttl`` setting"""
+    module_settings = get_settings().get("module", {}).get(module_name, {})
+    try:
+        return int(module_settings.get("cache_ttl", default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _is_fresh(doc: dict, ttl: int) -> bool:
+    """Checks if a cached document is younger than ``ttl``"""
+    now = floor(time())
+    return now - ttl <= doc.get("cache_time", 0) <= now
+
+
+def project(value: Any, projection: Projection) -> Any:
+    """Keeps only the fields of a value that are in the projection. Lists are projected item by item"""
+    if isinstance(value, list):
+        return [project(item, projection) for item in value]
+    if not isinstance(value, dict):
+        return value
+    projected = {}
+    for field in projection:
+        if isinstance(field, str):
+            if field in value:
+                projected[field] = value[field]
+            continue
+        for key, sub_projection in field.items():
+            if key in value:
+                projected[key] = project(value[key], sub_projection)
+    return projected
+
+
+def put(module_name: str, key: str, value: Any) -> None:
+    """Stores a value in the cache"""
+    data = Data(module_name, INDEXES)
+    Q = Query()
+    data.db.remove((Q.key == key) | ~Q.key.exists())
+    data.db.insert({"key": key, "value": value, "cache_time": floor(time())})
+
+
+def peek_many(
+    module_name: str, keys: Iterable[str], ttl: Optional[int] = None
+) -> Dict[str, Tuple[Any, bool]]:
+    """
+    Gets cached values without fetching them
+
+    :return: A dict of key: (value, is the value fresh), for the keys that are cached
+    """
+    if ttl is None:
+        ttl = get_ttl(module_name)
+    Q = Query()
+    docs = Data(module_name, INDEXES).db.search(
+        Q.key.one_of(list(keys)) & Q.value.exists()
+    )
+    return {doc["key"]: (doc["value"], _is_fresh(doc, ttl)) for doc in docs}
+
+
+def _fetch_and_store(module_name: str, key: str, fetch: Callable) -> Any:
+    """Fetches a value and stores it in the cache"""
+    try:
+        value = fetch()
+    except (RequestException, ValueError):
+        value = None
+    if value is None:
+        stats[module_name]["error"] += 1
+        Q = Query()
+        Data(module_name, INDEXES).db.upsert(
+            {"key": key, "error_time": floor(time())}, Q.key == key
+        )
+        return None
+    put(module_name, key, value)
+    _stale_modules.discard(module_name)
+    post("refreshed", module_name)
+    return value
+
+
+def _refresh(module_name: str, key: str, fetch: Callable) -> Any:
+    """Fetches a value and stores it. Concurrent refreshes of a key share one fetch"""
+    return singleflight.do(
+        (module_name, key), lambda: _fetch_and_store(module_name, key, fetch)
+    )
+
+
+def _refresh_in_background(module_name: str, key: str, fetch: Callable) -> None:
+    """Refreshes a value on another thread, unless it is already being refreshed"""
+    if not singleflight.in_flight((module_name, key)):
+        Thread(target=_refresh, args=(module_name, key, fetch), daemon=True).start()
+
+
+def _projected(fetch: Callable, projection: Projection) -> Callable:
+    """Wraps a fetch function to project the values it fetches"""
+
+    def fetch_projected():
+        return project(fetch(), projection)
+
+    return fetch_projected
+
+
+def get(
+    module_name: str,
+    key: str,
+    fetch: Callable,
+    ttl: Optional[int] = None,
+    default: Any = None,
+    projection: Optional[Projection] = None,
+) -> Any:
+    """
+    Gets a cached value, fetching it if needed
+
+    :param module_name: Name of the module, the value is stored in its data
+    :param key: Key of the value
+    :param fetch: Function that fetches the value. It should return None if it fails
+    :param ttl: Seconds the value is fresh for. Defaults to the module's ``cache_ttl``
+    :param default: Returned when there is no value
+    :param projection: The fields of fetched values that are stored. See ``project``
+    """
+    now = floor(time())
+    if ttl is None:
+        ttl = get_ttl(module_name)
+    if projection is not None:
+        fetch = _projected(fetch, projection)
+    Q = Query()
+    doc = Data(module_name, INDEXES).db.get(Q.key == key)
+    failed_recently = bool(doc) and doc.get("error_time", 0) > now - NEGATIVE_TTL
+    if doc and "value" in doc:
+        if _is_fresh(doc, ttl):
+            stats[module_name]["hit"] += 1
+            _stale_modules.discard(module_name)
+            return doc["value"]
+        stats[module_name]["stale"] += 1
+        _stale_modules.add(module_name)
+        if not failed_recently and _is_fetching():
+            value = _refresh(module_name, key, fetch)
+            return doc["value"] if value is None else value
+        if not failed_recently:
+            _refresh_in_background(module_name, key, fetch)
+        return doc["value"]
+    if failed_recently:
+        stats[module_name]["negative"] += 1
+        return default
+    stats[module_name]["miss"] += 1
+    if not is_blocking():
+        _refresh_in_background(module_name, key, fetch)
+        return default
+    value = _refresh(module_name, key, fetch)
+    return default if value is None else value
+
+
+def cached(
+    module_name: str,
+    key: Optional[str] = None,
+    ttl: Optional[int] = None,
+    default: Any = None,
+    projection: Optional[Projection] = None,
+):
+    """
+    Decorator that caches the return value of a fetch function.
+
+    The function should return None if the fetch fails. See ``get`` for the parameters.
+    ``key`` defaults to the function's name.
+    """
+
+    def decorator(func: Callable):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get(
+                module_name,
+                key or func.__name__,
+                lambda: func(*args, **kwargs),
+                ttl,
+                default,
+                projection,
+            )
+
+        return wrapper
+
+    return decorator
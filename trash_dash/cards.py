@@ -1,18 +1,33 @@
 """The cards on the main screen"""
 from collections.abc import Callable
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 from rich.align import Align
 from rich.console import RenderableType, RenderGroup
 from rich.panel import Panel
 
+from trash_dash import cache
 from trash_dash.events import emit
+from trash_dash.memo import memoized
 from trash_dash.modules import modules
 from trash_dash.settings import get_settings
 
 cards = get_settings().get("cards", [])
 
 
+def reload_cards() -> List[int]:
+    """Reads the cards from settings again. Returns the indexes of the cards that changed"""
+    old = dict(enumerate(cards))
+    cards[:] = get_settings().get("cards", [])
+    new = dict(enumerate(cards))
+    return [i for i in range(max(len(old), len(new))) if old.get(i) != new.get(i)]
+
+
+def get_card_indexes(module_name: str) -> List[int]:
+    """Gets the indexes of the cards showing a module"""
+    return [i for i, name in enumerate(cards) if name == module_name]
+
+
 def _render_card(card_index: int) -> Tuple[RenderableType, Callable]:
     try:
         name = cards[card_index]
@@ -23,20 +38,27 @@ def _render_card(card_index: int) -> Tuple[RenderableType, Callable]:
         return Align("[b]No card here!", "center", vertical="middle"), lambda: None
     if not card_item.meta.allow_card:
         return Align("[b]No card here!", "center", vertical="middle"), lambda: None
-    c = card_item.card()
-    if not c:
+
+    def render() -> Optional[RenderableType]:
+        c = card_item.card()
+        if not c:
+            return None
+        title = card_item.meta.display_name
+        if cache.is_stale(name):
+            title += " [dim](stale)"
+        return Panel(
+            RenderGroup(c, f"[i]Press [b]{card_index + 1}[/b] to view"),
+            title=title,
+        )
+
+    card = memoized(name, f"card:{card_index}", render)
+    if not card:
         return Align("[b]No card here!", "center", vertical="middle"), lambda: None
 
     def destroy():
         emit(f"{card_item.meta.name}.destroy")
 
-    return (
-        Panel(
-            RenderGroup(c, f"[i]Press [b]{card_index + 1}[/b] to view"),
-            title=card_item.meta.display_name,
-        ),
-        destroy,
-    )
+    return card, destroy
 
 
 def one():
@@ -0,0 +1,118 @@
+"""
+Command line tools
+
+    python main.py todo import FILE [--format csv|json|jsonl]
+    python main.py todo export FILE [--format csv|json|jsonl]
+
+Use ``-`` as the file to read from stdin, or write to stdout. The format is guessed from
+the file's extension if it isn't set.
+"""
+import csv
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+from trash_dash.modules.todo import Todo, TodoType
+
+FORMATS = ("csv", "json", "jsonl")
+# Type: file extension: format
+_EXTENSIONS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Fields of the exported tasks
+FIELDS = ("id", "text", "stage")
+
+
+def _get_format(path: str, file_format: Optional[str]) -> str:
+    """Gets the format of a file from its extension, unless it is set"""
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError(f"Can't guess the format of {path}, set it with --format")
+    return _EXTENSIONS[extension]
+
+
+@contextmanager
+def _open(path: str, mode: str) -> Iterator[IO[str]]:
+    """Opens a file, or stdin/stdout for ``-``"""
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+        return
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        yield f
+
+
+def read_tasks(f: IO[str], file_format: str) -> Iterator[Dict[str, Any]]:
+    """Reads tasks one by one. JSON files are read whole, as they are a single array"""
+    if file_format == "csv":
+        yield from csv.DictReader(f)
+    elif file_format == "json":
+        tasks = json.load(f)
+        if not isinstance(tasks, list):
+            raise ValueError("The JSON file should contain an array of tasks")
+        yield from tasks
+    else:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_tasks(f: IO[str], file_format: str, tasks: Iterable[TodoType]) -> int:
+    """Writes tasks one by one. Returns the number of written tasks"""
+    count = 0
+    if file_format == "csv":
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        for task in tasks:
+            writer.writerow(task)
+            count += 1
+    elif file_format == "json":
+        f.write("[")
+        for task in tasks:
+            f.write(f"{',' if count else ''}\n  {json.dumps(task)}")
+            count += 1
+        f.write("\n]\n")
+    else:
+        for task in tasks:
+            f.write(f"{json.dumps(task)}\n")
+            count += 1
+    return count
+
+
+def _import_todo(path: str, file_format: Optional[str]) -> str:
+    with _open(path, "r") as f:
+        count = Todo().import_items(read_tasks(f, _get_format(path, file_format)))
+    return f"Imported {count} tasks"
+
+
+def _export_todo(path: str, file_format: Optional[str]) -> str:
+    with _open(path, "w") as f:
+        count = write_tasks(f, _get_format(path, file_format), Todo().tasks)
+    return f"Exported {count} tasks"
+
+
+def main(argv: List[str]) -> int:
+    """Runs a command. Returns the exit code"""
+    parser = ArgumentParser(prog="trash_dash")
+    commands = parser.add_subparsers(dest="command", required=True)
+    todo = commands.add_parser("todo", help="Import or export the todo list")
+    todo_commands = todo.add_subparsers(dest="action", required=True)
+    for action, help_text in (
+        ("import", "Add tasks from a file"),
+        ("export", "Write the tasks to a file"),
+    ):
+        command = todo_commands.add_parser(action, help=help_text)
+        command.add_argument("file", help="Path to the file, or - for stdin/stdout")
+        command.add_argument("--format", choices=FORMATS, help="Format of the file")
+    args = parser.parse_args(argv)
+
+    run = _import_todo if args.action == "import" else _export_todo
+    try:
+        message = run(args.file, args.format)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(message, file=sys.stderr)
+    return 0
@@ -1,31 +1,373 @@
 """Wrapper for accessing data for modules"""
+import atexit
+import gzip
+import json
 import os
+from collections.abc import Callable
+from contextlib import contextmanager
+from copy import deepcopy
+from threading import Lock, RLock, Timer
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from tinydb import TinyDB
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import Storage
+from tinydb.table import Table
 
+from trash_dash.files import locked, write_atomic
+from trash_dash.jsonl_storage import JSONLinesStorage, diff_tables
+from trash_dash.settings import get_settings
+from trash_dash.sqlite_storage import SQLiteStorage, compile_query
 
-def _get_path(file_name: str) -> str:
+# Seconds to wait before unflushed writes are written to disk
+FLUSH_INTERVAL = 5
+
+
+def _get_path(file_name: str, extension: str = "json") -> str:
     """Gets a path relative to this file"""
     return os.path.abspath(
         os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), f"data/{file_name}.data.json"
+            os.path.dirname(os.path.abspath(__file__)),
+            f"data/{file_name}.data.{extension}",
         )
     )
 
 
+def _stat(path: str) -> Optional[Tuple[int, int, int]]:
+    """Gets the (inode, mtime, size) of a file, which change when it is replaced"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _merge(
+    base: Dict[str, Dict[str, Any]],
+    data: Dict[str, Dict[str, Any]],
+    theirs: Dict[str, Dict[str, Any]],
+) -> None:
+    """
+    Applies the changes made from ``base`` to ``data`` on ``theirs``
+
+    Documents inserted both here and by the other instance keep the other instance's ID,
+    and the ones inserted here get new IDs.
+    """
+    base_ids = {table: set(docs) for table, docs in base.items()}
+    for op in diff_tables(base, data):
+        if op.get("drop"):
+            theirs.pop(op["table"], None)
+            continue
+        docs = theirs.setdefault(op["table"], {})
+        if op.get("remove"):
+            docs.pop(op["id"], None)
+            continue
+        doc_id = op["id"]
+        if doc_id in docs and doc_id not in base_ids.get(op["table"], ()):
+            taken = docs.keys() | data.get(op["table"], {}).keys()
+            doc_id = str(max(int(taken_id) for taken_id in taken) + 1)
+        docs[doc_id] = op["doc"]
+
+
+class _AtomicJSONStorage(Storage):
+    """
+    Stores the database in a JSON file, which is replaced on every write
+
+    If another instance replaced the file since it was last read or written, the changes
+    made here are merged into the other instance's data before writing it.
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        # The tables as last read or written, and the stat of the file then
+        self.__base: Dict[str, Dict[str, Any]] = {}
+        self.__seen: Optional[Tuple[int, int, int]] = None
+        self.__read = False
+        # Number of times changes of another instance were read or merged
+        self.merges = 0
+
+    def __load(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            with open(self.__path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        return json.loads(self._decode(content)) if content else None
+
+    def changed(self) -> bool:
+        """Checks if another instance replaced the file since it was last read or written"""
+        return _stat(self.__path) != self.__seen
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        # A file replaced between the two calls is merged again, which changes nothing
+        stat = _stat(self.__path)
+        if self.__read and stat != self.__seen:
+            self.merges += 1
+        self.__seen = stat
+        self.__read = True
+        data = self.__load()
+        self.__base = deepcopy(data or {})
+        return data
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        with locked(self.__path):
+            stat = _stat(self.__path)
+            if stat is not None and stat != self.__seen:
+                theirs = self.__load() or {}
+                _merge(self.__base, data, theirs)
+                # ``data`` is the cache of the middleware, so it gets the merged data
+                data.clear()
+                data.update(theirs)
+                self.merges += 1
+            content = self._encode(json.dumps(data, separators=(",", ":")).encode())
+            write_atomic(self.__path, content)
+            self.__seen = _stat(self.__path)
+            self.__read = True
+        self.__base = deepcopy(data)
+
+    @staticmethod
+    def _encode(content: bytes) -> bytes:
+        """Encodes the JSON before it is written"""
+        return content
+
+    @staticmethod
+    def _decode(content: bytes) -> bytes:
+        """Decodes the content of the file to JSON"""
+        return content
+
+
+class _CompactJSONStorage(_AtomicJSONStorage):
+    """Stores the database in a gzip-compressed JSON file"""
+
+    @staticmethod
+    def _encode(content: bytes) -> bytes:
+        return gzip.compress(content)
+
+    @staticmethod
+    def _decode(content: bytes) -> bytes:
+        return gzip.decompress(content)
+
+
+class _WriteBehindMiddleware(CachingMiddleware):
+    """
+    Keeps the database in memory and writes it to disk in batches.
+
+    The file is parsed once, and writes are flushed every ``FLUSH_INTERVAL`` seconds,
+    after ``WRITE_CACHE_SIZE`` writes, or when the app exits. ``version`` is increased
+    every time the data changes.
+    """
+
+    WRITE_CACHE_SIZE = 100
+
+    def __init__(self, storage_cls):
+        super().__init__(storage_cls)
+        self.lock = RLock()
+        self.__timer: Optional[Timer] = None
+        self.__in_transaction = False
+        self.version = 0
+
+    def write(self, data):
+        with self.lock:
+            super().write(data)
+            self.version += 1
+            if self._cache_modified_count > 0 and self.__timer is None:
+                self.__timer = Timer(FLUSH_INTERVAL, self.flush)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def flush(self):
+        """Writes pending changes to disk, unless a transaction is running"""
+        with self.lock:
+            if self.__in_transaction:
+                return
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            super().flush()
+
+    def sync(self) -> None:
+        """Takes in the changes of other instances, if the storage can tell there are any"""
+        changed = getattr(self.storage, "changed", None)
+        with self.lock:
+            if self.__in_transaction or changed is None or not changed():
+                return
+            if self._cache_modified_count > 0:
+                # Merges the pending writes into the other instance's data
+                self.flush()
+            else:
+                self.cache = None
+                self.read()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Writes the changes made in the block at once. If the block raises, they are discarded"""
+        with self.lock:
+            self.flush()
+            self.__in_transaction = True
+            try:
+                yield
+            except BaseException:
+                # Read the data from disk again, which doesn't have the changes
+                self.cache = None
+                self._cache_modified_count = 0
+                self.version += 1
+                raise
+            finally:
+                self.__in_transaction = False
+            self.flush()
+
+
+class _Table(Table):
+    """
+    A table that serializes writes on its storage's lock
+
+    With ``SQLiteStorage``, searches that can be compiled to SQL are run by SQLite.
+    """
+
+    # Changes of other instances seen by the table
+    _merges = 0
+
+    def insert(self, document):
+        with self._storage.lock:
+            self.__sync()
+            return super().insert(document)
+
+    def insert_multiple(self, documents):
+        with self._storage.lock:
+            self.__sync()
+            return super().insert_multiple(documents)
+
+    def _update_table(self, updater):
+        with self._storage.lock:
+            super()._update_table(updater)
+
+    def __sync(self) -> None:
+        """Forgets the cached queries and next ID if changes of another instance were read"""
+        # The middleware forwards the attribute to its storage
+        merges = getattr(self._storage, "merges", 0)
+        if merges != self._merges:
+            self._merges = merges
+            self.clear_cache()
+            self._next_id = None
+
+    def __compile(self, cond) -> Optional[Tuple[str, List[Any]]]:
+        """Compiles a query to SQL, if the table is stored in SQLite"""
+        if not isinstance(getattr(self._storage, "storage", None), SQLiteStorage):
+            return None
+        return compile_query(getattr(cond, "_hash", None))
+
+    def search(self, cond):
+        self.__sync()
+        compiled = self.__compile(cond)
+        if compiled is None:
+            return super().search(cond)
+        cached = self._query_cache.get(cond)
+        if cached is not None:
+            return cached[:]
+        with self._storage.lock:
+            # Pending writes must be in the database for SQLite to see them
+            self._storage.flush()
+            rows = self._storage.storage.search(self.name, *compiled)
+        docs = [
+            self.document_class(doc, self.document_id_class(doc_id))
+            for doc_id, doc in rows
+        ]
+        if getattr(cond, "is_cacheable", lambda: True)():
+            self._query_cache[cond] = docs[:]
+        return docs
+
+    def get(self, cond=None, doc_id=None, doc_ids=None):
+        if doc_id is None and doc_ids is None and self.__compile(cond) is not None:
+            docs = self.search(cond)
+            return docs[0] if docs else None
+        return super().get(cond, doc_id, doc_ids)
+
+
+class _TinyDB(TinyDB):
+    table_class = _Table
+
+
+# Type: name of the ``storage`` setting: (storage class, taking the path, file extension)
+STORAGES: Dict[str, Tuple[Callable[[str], Storage], str]] = {
+    "json": (_AtomicJSONStorage, "json"),
+    "compact": (_CompactJSONStorage, "json.gz"),
+    "jsonl": (JSONLinesStorage, "jsonl"),
+    "sqlite": (SQLiteStorage, "db"),
+}
+DEFAULT_STORAGE = "json"
+
+
+def _get_storage_name(module_name: str) -> str:
+    """Gets the storage of a module from its ``storage`` setting"""
+    storage = get_settings().get("module", {}).get(module_name, {}).get("storage")
+    return storage if storage in STORAGES else DEFAULT_STORAGE
+
+
+def _migrate(path: str, storage: Storage) -> None:
+    """
+    Copies a ``.data.json`` file to a new storage, if the storage is empty
+
+    The file is renamed to ``.data.json.migrated`` afterwards, so that it isn't copied
+    again once everything in the new storage is removed.
+    """
+    if not os.path.exists(path):
+        storage.close()
+        return
+    if storage.read() is None:
+        with open(path, "r") as f:
+            content = f.read()
+        if content:
+            storage.write(json.loads(content))
+    storage.close()
+    os.replace(path, f"{path}.migrated")
+
+
+_handles: Dict[str, "Data"] = {}
+_handles_lock = Lock()
+
+
 class Data:
+    """
+    Shared handle to a module's data.
+
+    ``Data(module_name)`` always returns the same handle for a module, so the data file
+    is only read once per process. ``indexes`` are the fields the module searches by, which
+    are indexed if the module's data is stored in SQLite.
+    """
+
     __module_name: str
     __path: str
     __db: TinyDB
+    __storage: _WriteBehindMiddleware
+    # ``merges`` when ``check_changes`` was last called
+    __checked_merges = 0
 
     def __create_db(self) -> None:
-        """Creates and inits the database"""
-        self.__path = _get_path(self.__module_name)
-        self.__db = TinyDB(self.__path)
+        """Creates and inits the database, with the storage set in the module's settings"""
+        storage_cls, extension = STORAGES[_get_storage_name(self.__module_name)]
+        self.__path = _get_path(self.__module_name, extension)
+        if storage_cls is not _AtomicJSONStorage:
+            _migrate(_get_path(self.__module_name), storage_cls(self.__path))
+        self.__storage = _WriteBehindMiddleware(storage_cls)
+        self.__db = _TinyDB(self.__path, storage=self.__storage)
 
-    def __init__(self, module_name: str):
-        self.__module_name = module_name
-        self.__create_db()
+    def __new__(cls, module_name: str, indexes: Iterable[str] = ()):
+        with _handles_lock:
+            handle = _handles.get(module_name)
+            if handle is None:
+                handle = super().__new__(cls)
+                handle.__module_name = module_name
+                handle.__create_db()
+                _handles[module_name] = handle
+        handle.__add_indexes(indexes)
+        return handle
+
+    def __add_indexes(self, fields: Iterable[str]) -> None:
+        """Indexes fields, if the data is stored in SQLite"""
+        storage = self.__storage.storage
+        if isinstance(storage, SQLiteStorage):
+            for field in fields:
+                storage.add_index(field)
 
     @property
     def db(self):
@@ -36,3 +378,77 @@ class Data:
     def module_name(self):
         """The name of the module"""
         return self.__module_name
+
+    @property
+    def merges(self) -> int:
+        """
+        Increases every time changes of another instance are read or merged
+
+        Documents inserted here may get new IDs then, so indexes of the documents should be
+        built again.
+        """
+        return getattr(self.__storage.storage, "merges", 0)
+
+    @property
+    def version(self) -> int:
+        """Increases every time the data changes"""
+        return self.__storage.version + self.merges
+
+    def check_changes(self) -> bool:
+        """
+        Reads the data again if another instance changed it
+
+        :return: If changes of another instance were read or merged since the last call
+        """
+        self.__storage.sync()
+        merges = self.merges
+        changed = merges != self.__checked_merges
+        self.__checked_merges = merges
+        return changed
+
+    def flush(self) -> None:
+        """Writes pending changes to disk"""
+        self.__storage.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Writes the changes made in the block to disk at once
+
+        If the block raises, none of its changes are kept.
+        """
+        try:
+            with self.__storage.transaction():
+                yield
+        except BaseException:
+            for name in self.__db.tables():
+                self.__db.table(name).clear_cache()
+            raise
+
+
+def get_version(module_name: str) -> int:
+    """Gets the version of a module's data, without opening it"""
+    handle = _handles.get(module_name)
+    return handle.version if handle is not None else 0
+
+
+def check_changes() -> List[str]:
+    """
+    Reads the data of every open handle again, if another instance changed it
+
+    :return: The names of the modules whose data changed
+    """
+    with _handles_lock:
+        handles = list(_handles.values())
+    return [handle.module_name for handle in handles if handle.check_changes()]
+
+
+def flush_all() -> None:
+    """Writes pending changes of every open handle to disk"""
+    with _handles_lock:
+        handles = list(_handles.values())
+    for handle in handles:
+        handle.flush()
+
+
+atexit.register(flush_all)
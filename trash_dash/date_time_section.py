@@ -6,6 +6,11 @@ from rich.console import RenderableType, RenderGroup
 from rich.padding import Padding
 
 
+def get_minute() -> str:
+    """Returns the minute that is shown, which changes the section when it changes"""
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
 def date_time_section() -> RenderableType:
     """Returns the datetime display"""
     now = datetime.now()
@@ -1,8 +1,16 @@
 """Basic event emitter"""
+import os
 from collections.abc import Callable
-from typing import Any
+from queue import Empty, SimpleQueue
+from typing import Any, Optional, Tuple
 
 _event_handlers = {}
+_posted_events: SimpleQueue = SimpleQueue()
+# Pipe that wakes up the main loop. Only used where the main loop can wait on it
+_wakeup_pipe: Optional[Tuple[int, int]] = os.pipe() if os.name == "posix" else None
+if _wakeup_pipe is not None:
+    for fd in _wakeup_pipe:
+        os.set_blocking(fd, False)
 
 
 def on(name: str, handler: Callable):
@@ -26,8 +34,57 @@ def off(name: str):
         _event_handlers.pop(name)
 
 
+def off_all(prefix: str):
+    """Unregister every event whose name starts with the prefix"""
+    for name in [name for name in _event_handlers if name.startswith(prefix)]:
+        _event_handlers.pop(name)
+
+
 def emit(name: str, *args: Any):
     """Call the handler associated with the event"""
     handler = _event_handlers.get(name)
     if handler:
         handler(*args)
+
+
+def get_wakeup_fd() -> Optional[int]:
+    """Gets the file descriptor the main loop waits on, which is readable after ``wake``"""
+    return _wakeup_pipe[0] if _wakeup_pipe is not None else None
+
+
+def wake():
+    """Wakes up the main loop. Can be called from any thread"""
+    if _wakeup_pipe is None:
+        return
+    try:
+        os.write(_wakeup_pipe[1], b"\0")
+    except BlockingIOError:
+        # The pipe is full, so the main loop will wake up anyway
+        pass
+
+
+def clear_wakeup():
+    """Empties the wakeup pipe. Should be called from the main thread"""
+    if _wakeup_pipe is None:
+        return
+    try:
+        while os.read(_wakeup_pipe[0], 4096):
+            pass
+    except BlockingIOError:
+        pass
+
+
+def post(name: str, *args: Any):
+    """Queue an event to be emitted on the main thread. Can be called from any thread"""
+    _posted_events.put((name, args))
+    wake()
+
+
+def dispatch_posted():
+    """Emit the queued events. Should be called from the main thread"""
+    while True:
+        try:
+            name, args = _posted_events.get_nowait()
+        except Empty:
+            return
+        emit(name, *args)
@@ -0,0 +1,65 @@
+"""
+Safe file writes, shared by every running instance
+
+Files are written to a temporary file that replaces the original, so readers never see a
+half-written file. Writers also take an advisory lock on ``<file>.lock``, so two
+dashboards don't interleave their writes.
+"""
+import os
+import stat
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+from typing import Iterator, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+# Permissions of new files, read once as the umask can only be read by changing it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Holds the advisory lock of a file. Does nothing where advisory locks aren't supported"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _get_mode(path: str) -> int:
+    """Gets the permissions of a file, or the ones of new files if it doesn't exist"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def write_atomic(path: str, content: Union[str, bytes]) -> None:
+    """
+    Writes a file through a temporary file, so it is never half-written
+
+    The temporary file is given the permissions of the file, so that they are kept.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with NamedTemporaryFile(mode, dir=directory, prefix=".tmp-", delete=False) as f:
+        try:
+            os.chmod(f.name, _get_mode(path))
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
@@ -0,0 +1,109 @@
+"""
+Shared HTTP client for modules
+
+Requests to a host share a pooled session, so connections are kept alive between
+refreshes. Every request has a timeout, failed requests are retried with backoff, and
+the number of requests running at once is limited per host. Responses are cached on
+disk by ``trash_dash.http_cache``, and hosts that keep failing are cut off by
+``trash_dash.breaker``. See ``trash_dash.replay`` to record responses and replay them
+offline.
+"""
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+from requests import Request, Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from trash_dash import http_cache, replay
+from trash_dash.breaker import get_breaker
+
+# Seconds to wait for a connection, and for the response
+TIMEOUT = (3.05, 10)
+# Number of times a failed request is retried
+RETRIES = 2
+# Retries wait for {backoff factor} * (2 ** ({retry number} - 1)) seconds
+BACKOFF_FACTOR = 0.5
+# Number of requests that can be sent to a host at once
+MAX_CONNECTIONS_PER_HOST = 10
+
+# Type: host: (session, semaphore)
+_sessions: Dict[str, Tuple[Session, BoundedSemaphore]] = {}
+_sessions_lock = Lock()
+
+
+def _create_session() -> Session:
+    """Creates a session that retries failed requests"""
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=MAX_CONNECTIONS_PER_HOST, max_retries=retry
+    )
+    session = Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_session(host: str) -> Tuple[Session, BoundedSemaphore]:
+    """Gets the session of a host, creating it if needed"""
+    with _sessions_lock:
+        if host not in _sessions:
+            _sessions[host] = (
+                _create_session(),
+                BoundedSemaphore(MAX_CONNECTIONS_PER_HOST),
+            )
+        return _sessions[host]
+
+
+def _send(url: str, cache: bool, **kwargs) -> Response:
+    """Sends a GET request through the host's session"""
+    session, semaphore = _get_session(urlsplit(url).netloc)
+    if not cache:
+        with semaphore:
+            return session.get(url, **kwargs)
+
+    headers = kwargs.pop("headers", None) or {}
+    with semaphore:
+        res = session.get(
+            url, headers={**http_cache.validators(url), **headers}, **kwargs
+        )
+        if res.status_code == 304:
+            cached = http_cache.load(url, res)
+            if cached is not None:
+                return cached
+            # The stored response is gone, download it again
+            res = session.get(url, headers=headers, **kwargs)
+    http_cache.store(url, res)
+    return res
+
+
+def get(url: str, cache: bool = True, **kwargs) -> Response:
+    """
+    Sends a GET request
+
+    Takes the same arguments as ``requests.get``. ``timeout`` defaults to ``TIMEOUT``.
+
+    :param cache: Use the on-disk response cache
+    :raises CircuitOpenError: If the host's circuit is open
+    """
+    url = str(Request("GET", url, params=kwargs.pop("params", None)).prepare().url)
+    breaker = get_breaker(urlsplit(url).netloc)
+    breaker.check()
+    kwargs.setdefault("timeout", TIMEOUT)
+    start = monotonic()
+    try:
+        res = _send(replay.rewrite(url), cache, **kwargs)
+    except BaseException:
+        # Anything else, e.g. failing to store the response, must also end a trial request
+        breaker.record(False, monotonic() - start)
+        raise
+    breaker.record(res.status_code < 500, monotonic() - start)
+    replay.record(url, res)
+    return res
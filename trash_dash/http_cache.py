@@ -0,0 +1,123 @@
+"""
+On-disk cache of HTTP responses
+
+Responses that have an ``ETag`` or a ``Last-Modified`` header are stored in
+``data/http_cache``, and revalidated with conditional requests. When the server answers
+with ``304 Not Modified``, the stored body is used instead of downloading it again.
+The least recently used responses are removed once the cache grows over ``MAX_SIZE``.
+"""
+import os
+from hashlib import sha256
+from math import floor
+from time import time
+from typing import Dict, Optional
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from tinydb import Query
+
+from trash_dash.data import Data
+from trash_dash.files import write_atomic
+
+# Max total size of the cached bodies, in bytes
+MAX_SIZE = 50 * 1024 * 1024
+
+PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/http_cache")
+)
+
+
+def _get_path(url: str) -> str:
+    """Gets the path of the file a response body is stored in"""
+    return os.path.join(PATH, sha256(url.encode()).hexdigest())
+
+
+def _read_body(url: str) -> Optional[bytes]:
+    """Reads a stored body, returns None if it doesn't exist"""
+    try:
+        with open(_get_path(url), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_body(url: str, body: bytes) -> None:
+    """Writes a body through a temporary file, so it is never half-written"""
+    write_atomic(_get_path(url), body)
+
+
+def _evict() -> None:
+    """Removes the least recently used responses until the cache fits in ``MAX_SIZE``"""
+    db = Data("http_cache").db
+    entries = sorted(db.all(), key=lambda x: x.get("last_access", 0))
+    size = sum(entry.get("size", 0) for entry in entries)
+    Q = Query()
+    for entry in entries:
+        if size <= MAX_SIZE:
+            break
+        try:
+            os.remove(_get_path(entry["url"]))
+        except OSError:
+            pass
+        db.remove(Q.url == entry["url"])
+        size -= entry.get("size", 0)
+
+
+def validators(url: str) -> Dict[str, str]:
+    """Gets the headers to revalidate a stored response with"""
+    entry = Data("http_cache").db.get(Query().url == url)
+    if not entry or not os.path.exists(_get_path(url)):
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def load(url: str, res: Response) -> Optional[Response]:
+    """
+    Turns a ``304 Not Modified`` response into the stored response
+
+    :return: The stored response, or None if it isn't stored anymore
+    """
+    Q = Query()
+    db = Data("http_cache").db
+    entry = db.get(Q.url == url)
+    body = _read_body(url)
+    if not entry or body is None:
+        return None
+    db.update({"last_access": floor(time())}, Q.url == url)
+    cached = Response()
+    cached.status_code = 200
+    cached.reason = "OK"
+    cached.url = url
+    cached.headers = CaseInsensitiveDict(entry.get("headers", {}))
+    cached.encoding = res.encoding or entry.get("encoding")
+    cached.request = res.request
+    cached.elapsed = res.elapsed
+    cached._content = body
+    return cached
+
+
+def store(url: str, res: Response) -> None:
+    """Stores a response, if it can be revalidated later"""
+    etag = res.headers.get("ETag")
+    last_modified = res.headers.get("Last-Modified")
+    if not res.ok or not (etag or last_modified):
+        return
+    _write_body(url, res.content)
+    Data("http_cache").db.upsert(
+        {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": {"Content-Type": res.headers.get("Content-Type", "")},
+            "encoding": res.encoding,
+            "size": len(res.content),
+            "last_access": floor(time()),
+        },
+        Query().url == url,
+    )
+    _evict()
@@ -0,0 +1,163 @@
+"""
+Append-only storage for ``Data``
+
+Instead of rewriting the whole file, every write appends the documents that changed as
+JSON lines. The lines are replayed when the file is opened. Once most lines are
+overwritten by newer ones, the file is compacted in the background.
+"""
+import json
+import os
+from copy import deepcopy
+from threading import RLock, Thread
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from tinydb.storages import Storage
+
+from trash_dash.files import locked, write_atomic
+
+# Lines that are overwritten by newer lines, after which the file is compacted
+COMPACT_MIN_GARBAGE = 100
+# Ratio of overwritten lines to live documents, after which the file is compacted
+COMPACT_RATIO = 1
+
+
+def diff_tables(
+    written: Dict[str, Dict[str, Any]], data: Dict[str, Dict[str, Any]]
+) -> List[dict]:
+    """
+    Gets the changes that turn the written tables into ``data``, and applies them to ``written``
+
+    :return: The changes, in the format of the lines of ``JSONLinesStorage``
+    """
+    ops: List[dict] = []
+    for table in written.keys() - data.keys():
+        ops.append({"table": table, "drop": True})
+        del written[table]
+    for table, docs in data.items():
+        written_docs = written.setdefault(table, {})
+        for doc_id in written_docs.keys() - docs.keys():
+            ops.append({"table": table, "id": doc_id, "remove": True})
+            del written_docs[doc_id]
+        for doc_id, doc in docs.items():
+            if written_docs.get(doc_id) != doc:
+                ops.append({"table": table, "id": doc_id, "doc": doc})
+                written_docs[doc_id] = deepcopy(doc)
+    return ops
+
+
+class JSONLinesStorage(Storage):
+    def __init__(self, path: str):
+        """
+        Stores a TinyDB database as JSON lines
+
+        Each line is one of ``{"table", "id", "doc"}`` (the document was written),
+        ``{"table", "id", "remove": true}`` (the document was removed) or
+        ``{"table", "drop": true}`` (the table was removed).
+
+        :param path: Path to the file
+        """
+        self.__path = path
+        self.__lock = RLock()
+        # Type: table: {doc_id: doc}, as last written to the file
+        self.__written: Dict[str, Dict[str, Any]] = {}
+        self.__lines = 0
+        self.__compacting = False
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self.__lock:
+            try:
+                with locked(self.__path), open(self.__path, "rb+") as f:
+                    tables, lines = self.__replay(f)
+            except FileNotFoundError:
+                return None
+            self.__written = deepcopy(tables)
+            self.__lines = lines
+            return tables if lines else None
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        with self.__lock:
+            ops = diff_tables(self.__written, data)
+            if not ops:
+                return
+            content = "".join(f"{json.dumps(op)}\n" for op in ops).encode()
+            with locked(self.__path):
+                with open(self.__path, "ab+") as f:
+                    # Start on a new line, even if the last line wasn't finished
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            content = b"\n" + content
+                    f.write(content)
+            self.__lines += len(ops)
+            if self.__needs_compaction():
+                self.__compacting = True
+                Thread(target=self.compact, daemon=True).start()
+
+    def compact(self) -> None:
+        """
+        Rewrites the file with one line per document
+
+        The file is replayed again first, as other instances may have appended to it.
+        """
+        with self.__lock:
+            try:
+                with locked(self.__path):
+                    with open(self.__path, "rb+") as f:
+                        tables, _ = self.__replay(f)
+                    lines = [
+                        json.dumps({"table": table, "id": doc_id, "doc": doc})
+                        for table, docs in tables.items()
+                        for doc_id, doc in docs.items()
+                    ]
+                    write_atomic(self.__path, "".join(f"{line}\n" for line in lines))
+                self.__lines = len(lines)
+            except FileNotFoundError:
+                pass
+            finally:
+                self.__compacting = False
+
+    @classmethod
+    def __replay(cls, f: BinaryIO) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """
+        Replays the lines of the file
+
+        :param f: The file, opened with ``rb+`` while holding its lock
+        :return: The tables, and the number of lines
+        """
+        tables: Dict[str, Dict[str, Any]] = {}
+        lines = 0
+        # Bytes of the file up to the end of the last whole line
+        valid = 0
+        for line in f:
+            try:
+                op = json.loads(line)
+            except ValueError:
+                if not line.endswith(b"\n"):
+                    # The last line is cut short if an instance stopped while writing it
+                    f.truncate(valid)
+                    break
+                # Writes start on a new line, so only this line is lost
+                op = None
+            valid += len(line)
+            lines += 1
+            if op is not None:
+                cls.__apply(tables, op)
+        return tables, lines
+
+    @staticmethod
+    def __apply(tables: Dict[str, Dict[str, Any]], op: dict) -> None:
+        """Applies a line to the tables"""
+        if op.get("drop"):
+            tables.pop(op["table"], None)
+        elif op.get("remove"):
+            tables.get(op["table"], {}).pop(op["id"], None)
+        else:
+            tables.setdefault(op["table"], {})[op["id"]] = op["doc"]
+
+    def __needs_compaction(self) -> bool:
+        """Checks if enough lines are overwritten to compact the file"""
+        if self.__compacting:
+            return False
+        docs = sum(len(docs) for docs in self.__written.values())
+        garbage = self.__lines - docs
+        return garbage >= COMPACT_MIN_GARBAGE and garbage >= docs * COMPACT_RATIO
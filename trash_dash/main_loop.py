@@ -0,0 +1,96 @@
+"""
+Waits for keystrokes, and for events posted from other threads
+
+The main loop sleeps until a key is pressed, ``trash_dash.events.wake`` is called, the
+shown minute changes, a frame is due, or a tick asked for with ``wake_in`` is due, and
+at most ``MAX_IDLE`` seconds. Where stdin can't be waited on (e.g. Windows), the keyboard
+is polled instead.
+"""
+import os
+import select
+import sys
+from threading import Lock, current_thread, main_thread
+from time import monotonic, time
+from typing import List, Optional
+
+from blessed import Terminal
+from blessed.keyboard import Keystroke
+
+from trash_dash import renderer
+from trash_dash.events import clear_wakeup, get_wakeup_fd, wake
+
+# Longest seconds the main loop sleeps for, so that changes to settings.toml are noticed
+MAX_IDLE = 5
+# Seconds between two checks of the keyboard, where it is polled
+POLL_INTERVAL = 0.1
+
+# When (of ``monotonic``) the event loop should run again, asked for with ``wake_in``
+_next_tick: Optional[float] = None
+_next_tick_lock = Lock()
+
+
+def wake_in(seconds: float) -> None:
+    """
+    Runs the event loop again after ``seconds``, e.g. to animate or count down
+
+    Can be called from any thread. Should be called again on every tick that needs a next one.
+    """
+    global _next_tick
+    now = monotonic()
+    tick = now + max(seconds, 0)
+    with _next_tick_lock:
+        if _next_tick is None or _next_tick <= now or tick < _next_tick:
+            _next_tick = tick
+    if current_thread() is not main_thread():
+        # The main loop may be sleeping for longer
+        wake()
+
+
+def get_timeout() -> float:
+    """Gets the seconds until the main loop should run again, at most ``MAX_IDLE``"""
+    global _next_tick
+    timeout = min(60 - time() % 60, MAX_IDLE)
+    delay = renderer.get_delay()
+    if delay is not None:
+        timeout = min(timeout, delay)
+    with _next_tick_lock:
+        if _next_tick is not None:
+            tick_delay = _next_tick - monotonic()
+            if tick_delay <= 0:
+                # The tick may have been due while the event loop was running, so run it again
+                _next_tick = None
+            timeout = min(timeout, max(tick_delay, 0))
+    return timeout
+
+
+def _can_wait() -> bool:
+    """Checks if stdin and the wakeup pipe can be waited on together"""
+    return os.name == "posix" and get_wakeup_fd() is not None and sys.stdin.isatty()
+
+
+def _drain(term: Terminal) -> List[Keystroke]:
+    """Gets every key that was pressed, without waiting"""
+    keys: List[Keystroke] = []
+    while True:
+        key = term.inkey(timeout=0)
+        if not key:
+            return keys
+        keys.append(key)
+
+
+def wait(term: Terminal, timeout: float) -> List[Keystroke]:
+    """
+    Waits until a key is pressed, the main loop is woken up, or ``timeout`` seconds pass
+
+    :return: Every key that was pressed, in order
+    """
+    keys = _drain(term)
+    if keys:
+        return keys
+    wakeup_fd = get_wakeup_fd()
+    if wakeup_fd is None or not _can_wait():
+        key = term.inkey(timeout=min(timeout, POLL_INTERVAL))
+        return [key, *_drain(term)] if key else []
+    select.select([sys.stdin.fileno(), wakeup_fd], [], [], timeout)
+    clear_wakeup()
+    return _drain(term)
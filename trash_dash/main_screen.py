@@ -1,50 +1,83 @@
 """Main screen"""
+from typing import List, Set
+
 from rich.align import Align
 from rich.columns import Columns
-from rich.console import RenderGroup
+from rich.console import RenderableType, RenderGroup
 from rich.padding import Padding
 
 from trash_dash.body import body
 from trash_dash.events import emit, on, once
+from trash_dash.modules import modules
 from trash_dash.screen import Screen
 from trash_dash.settings import get_settings
 
 
-def create_screen() -> Screen:
-    """Creates and returns a screen"""
+def _header() -> RenderableType:
+    """Renders the header of the main screen"""
     app_settings = get_settings()
-    body_renderable, body_destroy, body_update = body()
-    screen = Screen(
-        "main",
-        header_renderable=Padding(
-            RenderGroup(
-                Columns(
-                    [
-                        Align(
-                            f"[bold u]{app_settings.get('app_name', 'TrashDash')}[/]",
-                            align="left",
-                            vertical="middle",
-                        ),
-                        Align(
-                            "[bold]Settings(s)    Exit(q)[/]",
-                            align="right",
-                            vertical="middle",
-                        ),
-                    ],
-                    expand=True,
-                ),
-                Align("Use the [yellow]keyboard[/] to navigate!", align="center"),
+    return Padding(
+        RenderGroup(
+            Columns(
+                [
+                    Align(
+                        f"[bold u]{app_settings.get('app_name', 'TrashDash')}[/]",
+                        align="left",
+                        vertical="middle",
+                    ),
+                    Align(
+                        "[bold]Settings(s)    Exit(q)[/]",
+                        align="right",
+                        vertical="middle",
+                    ),
+                ],
+                expand=True,
             ),
-            (1, 3, 0, 3),
+            Align("Use the [yellow]keyboard[/] to navigate!", align="center"),
         ),
-        body_renderable=body_renderable,
+        (1, 3, 0, 3),
     )
 
-    def el():
-        screen.render_body(body_update())
+
+def create_screen() -> Screen:
+    """Creates and returns a screen"""
+    initial_body, body_destroy, body_update, body_reload = body()
+    screen = Screen("main", header_renderable=_header(), body_renderable=initial_body)
+
+    def el(header_changed: bool = False):
+        """Pushes the screen to the terminal, only if it changed"""
+        body_renderable = body_update()
+        if body_renderable is not None:
+            screen.render_body(body_renderable)
+        elif not header_changed:
+            return
         emit("main.update", screen.layout)
 
+    def refreshed(module_name: str):
+        """Renders the cards showing the module again, with its new data"""
+        body_reload([module_name])
+        el()
+
+    def settings_changed(
+        changed: Set[str], changed_modules: Set[str], changed_cards: List[int]
+    ):
+        """Renders the parts of the screen whose settings changed again"""
+        if "app_name" in changed:
+            screen.render_header(_header())
+        body_reload(changed_modules, changed_cards)
+        el("app_name" in changed)
+
+    def shown():
+        """Renders the screen again, as it may have changed while another screen was shown"""
+        screen.render_header(_header())
+        # Parts whose modules didn't change are reused, see ``trash_dash.memo``
+        body_reload(modules, range(3))
+        el(True)
+
     once("main.destroy", body_destroy)
+    on("main.show", shown)
     on("main.event_loop", el)
+    on("main.refreshed", refreshed)
+    on("main.settings_changed", settings_changed)
 
     return screen
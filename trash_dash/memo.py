@@ -0,0 +1,57 @@
+"""
+Reuses the renderables of modules while their data doesn't change
+
+A renderable is kept for each view of a module (e.g. its card), and is reused as long as
+the version of the module's data, whether the data is stale, and the console width are
+the same. Layouts are updated in place by the modules showing them, so they are never
+reused.
+"""
+from collections.abc import Callable
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from rich.layout import Layout
+
+from trash_dash import cache, data
+from trash_dash.console import console
+
+# Type: (module_name, view): (key, names of the modules it shows, renderable)
+_views: Dict[Tuple[str, str], Tuple[Hashable, Tuple[str, ...], Any]] = {}
+
+
+def _get_key(module_names: Tuple[str, ...]) -> Hashable:
+    """Gets the key of a view showing the modules"""
+    versions = tuple(
+        (data.get_version(name), cache.is_stale(name)) for name in module_names
+    )
+    return versions, console.width
+
+
+def memoized(
+    module_name: str,
+    view: str,
+    render: Callable[[], Any],
+    depends_on: Optional[Iterable[str]] = None,
+) -> Any:
+    """
+    Gets a view of a module, rendering it only if it may have changed
+
+    :param module_name: Name of the module
+    :param view: Kind of view, e.g. ``card`` or ``display``
+    :param render: Function rendering the view
+    :param depends_on: Names of the modules whose data is shown. Defaults to the module
+    """
+    module_names = (module_name,) if depends_on is None else tuple(depends_on)
+    kept = _views.get((module_name, view))
+    if kept is not None and kept[0] == _get_key(module_names):
+        return kept[2]
+    renderable = render()
+    # Rendering reads the data, so its version is checked afterwards
+    if not isinstance(renderable, Layout):
+        _views[(module_name, view)] = (_get_key(module_names), module_names, renderable)
+    return renderable
+
+
+def invalidate(module_name: str) -> None:
+    """Forgets the views showing a module, e.g. after its data was refreshed"""
+    for view in [view for view, kept in _views.items() if module_name in kept[1]]:
+        del _views[view]
@@ -119,6 +119,17 @@ class Module:
         """
         pass
 
+    @staticmethod
+    def fetch() -> None:
+        """
+        This method is called on a background thread to fetch the module's data.
+
+        It's called when the app starts, and then every ``refresh_interval`` seconds (set in the
+        module's settings). If your module fetches data from the internet, fetch and cache it
+        here, so that the other methods can read it without waiting on the network.
+        """
+        pass
+
     @staticmethod
     def card() -> Optional[RenderableType]:
         """
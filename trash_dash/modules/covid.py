@@ -1,14 +1,12 @@
-from json import JSONDecodeError
-from math import floor
-from time import time
 from typing import Optional, TypedDict
 
-from requests import get
-from tinydb import Query
-
-from trash_dash.data import Data
+from trash_dash.cache import cached
+from trash_dash.http import get
 from trash_dash.module import Module, register_module
 
+# Fields of the cases that are rendered
+PROJECTION = ("confirmed",)
+
 
 class Covid19Type(TypedDict):
     population: int
@@ -19,34 +17,18 @@ class Covid19Type(TypedDict):
 
 class CovidModule(Module):
     @classmethod
+    @cached("covid", projection=PROJECTION)
     def get_data(cls) -> Optional[Covid19Type]:
         """Gets the latest worldwide news"""
-        data = Data("covid")
-        Q = Query()
-        d = data.db.search(
-            (Q.cache_time >= (floor(time()) - 86400)) & (Q.cache_time <= floor(time()))
-        )
-        if d:
-            try:
-                return d[0].get("covid")
-            except (IndexError, KeyError):
-                data.db.remove(Q.cache_time - 86400 < floor(time()))
-        else:
-            data.db.truncate()
-        try:
-            res = get("https://covid-api.mmediagroup.fr/v1/cases")
-            if not res.ok:
-                return None
-            covid = res.json().get("Global").get("All")
-            data.db.insert(
-                {
-                    "covid": covid,
-                    "cache_time": floor(time()),
-                }
-            )
-            return covid
-        except JSONDecodeError:
+        res = get("https://covid-api.mmediagroup.fr/v1/cases")
+        if not res.ok:
             return None
+        return res.json().get("Global").get("All")
+
+    @classmethod
+    def fetch(cls):
+        """Keeps the covid data cached"""
+        cls.get_data()
 
     @classmethod
     def today(cls):
@@ -1,65 +1,199 @@
-from json import JSONDecodeError, loads
-from math import floor
+import re
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from json import loads
+from math import ceil, floor
+from threading import Lock, Thread
 from time import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from requests import get
+from blessed.keyboard import Keystroke
+from requests import RequestException
 from rich.align import Align
-from rich.console import RenderGroup
+from rich.console import RenderableType, RenderGroup
+from rich.layout import Layout
 from rich.markup import escape
 from rich.padding import Padding
 from rich.text import Text
 from tinydb import Query
 
+from trash_dash import cache
 from trash_dash.data import Data
+from trash_dash.events import emit, off, on, wake
+from trash_dash.http import get
 from trash_dash.module import Module, register_module
 
+API_URL = "https://hacker-news.firebaseio.com/v0"
+# Number of items fetched at once
+MAX_WORKERS = 10
+# Seconds to wait for a single item
+TIMEOUT = 5
+# Seconds the top stories ranking is fresh for, unless ``cache_ttl`` is set
+TOP_STORIES_TTL = 300
+# Seconds a story is fresh for, unless ``cache_ttl`` is set
+ITEM_TTL = 3600
+# Number of stories shown
+STORIES_COUNT = 10
+# Number of stories in a page of the Hacker News screen
+PAGE_SIZE = 10
+# Number of pages kept in memory
+MAX_PAGES = 5
+# Seconds a comment is fresh for, unless ``cache_ttl`` is set
+COMMENT_TTL = 3600
+# Number of comment levels fetched
+MAX_COMMENT_DEPTH = 5
+# Number of comments fetched for a story
+MAX_COMMENTS = 200
+# Number of comments in a page of the comments view
+COMMENTS_PAGE_SIZE = 10
+# Fields of the stories and comments that are rendered
+ITEM_PROJECTION = (
+    "id",
+    "type",
+    "by",
+    "title",
+    "url",
+    "text",
+    "kids",
+    "deleted",
+    "dead",
+)
+
+
+def _get_item(item_id: int) -> Optional[dict]:
+    """Fetches a single item, returns None if it can't be fetched"""
+    try:
+        res = get(f"{API_URL}/item/{item_id}.json", timeout=TIMEOUT)
+        if not res.ok:
+            return None
+        return cache.project(loads(res.content), ITEM_PROJECTION)
+    except (RequestException, ValueError):
+        return None
+
+
+def _get_items(item_ids: List[int]) -> List[Optional[dict]]:
+    """Fetches items concurrently, in the same order as ``item_ids``"""
+    if not item_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(item_ids))) as executor:
+        return list(executor.map(_get_item, item_ids))
+
+
+def _get_cached_items(
+    item_ids: List[int],
+    prefix: str = "item",
+    ttl: int = ITEM_TTL,
+    fetch_missing: bool = True,
+) -> List[dict]:
+    """
+    Gets items from the item cache, in the same order as ``item_ids``
+
+    Only items that aren't cached, or have expired, are fetched.
+
+    :param prefix: Prefix of the cache keys, ``item`` for stories and ``comment`` for comments
+    :param ttl: Default seconds the items are fresh for, see ``cache.get_ttl``
+    :param fetch_missing: If False, expired items are returned and missing items are skipped
+    """
+    cached_items = cache.peek_many(
+        "hacker_news",
+        [f"{prefix}:{item_id}" for item_id in item_ids],
+        cache.get_ttl("hacker_news", ttl),
+    )
+    items = {
+        int(key.split(":")[1]): item
+        for key, (item, fresh) in cached_items.items()
+        if fresh or not fetch_missing
+    }
+    if not fetch_missing:
+        return [items[item_id] for item_id in item_ids if item_id in items]
+    missing = [item_id for item_id in item_ids if item_id not in items]
+    for item_id, item in zip(missing, _get_items(missing)):
+        if item:
+            cache.put("hacker_news", f"{prefix}:{item_id}", item)
+            items[item_id] = item
+    return [items[item_id] for item_id in item_ids if item_id in items]
+
+
+def _get_top_stories() -> Optional[List[int]]:
+    """
+    Fetches the top stories ranking
+
+    Stories that have not been seen before are fetched into the item cache. Stories
+    that dropped out of the ranking, and expired comments, are removed from it.
+    """
+    res = get(f"{API_URL}/topstories.json", timeout=TIMEOUT)
+    if not res.ok:
+        return None
+    top_stories: List[int] = loads(res.content)
+    ranked = {f"item:{item_id}" for item_id in top_stories}
+    expired = floor(time()) - cache.get_ttl("hacker_news", COMMENT_TTL)
+    Q = Query()
+    Data("hacker_news").db.remove(
+        Q.key.test(lambda key: key.startswith("item:") and key not in ranked)
+        | (
+            Q.key.test(lambda key: key.startswith("comment:"))
+            & (Q.cache_time < expired)
+        )
+    )
+    _get_cached_items(top_stories[:STORIES_COUNT])
+    return top_stories
+
+
+def _get_comments(story: dict, on_level: Callable[[List[dict]], None]) -> None:
+    """
+    Fetches the comments of a story breadth-first
+
+    Each level of the tree is fetched concurrently, up to ``MAX_COMMENT_DEPTH`` levels
+    and ``MAX_COMMENTS`` comments in total.
+
+    :param on_level: Called with the comments of each level as soon as it is fetched
+    """
+    level: List[int] = story.get("kids", [])
+    depth = 0
+    fetched = 0
+    while level and depth < MAX_COMMENT_DEPTH and fetched < MAX_COMMENTS:
+        level = level[: MAX_COMMENTS - fetched]
+        comments = _get_cached_items(level, "comment", COMMENT_TTL)
+        fetched += len(level)
+        depth += 1
+        on_level(comments)
+        level = [
+            kid
+            for comment in comments
+            if not comment.get("deleted") and not comment.get("dead")
+            for kid in comment.get("kids", [])
+        ]
+
+
+def _comment_text(html: str) -> str:
+    """Converts the HTML of a comment to plain text"""
+    return unescape(re.sub(r"<[^>]+>", "", html.replace("<p>", "\n")))
+
 
 class HackerNewsModule(Module):
     @staticmethod
     def get_news():
         """Fetches news from YC"""
-        data = Data("hacker_news")
-        Q = Query()
-        d = data.db.search(
-            (Q.cache_time >= (floor(time()) - 86400)) & (Q.cache_time <= floor(time()))
+        top_stories = cache.get(
+            "hacker_news",
+            "top_stories",
+            _get_top_stories,
+            cache.get_ttl("hacker_news", TOP_STORIES_TTL),
+            [],
         )
-        if d:
-            try:
-                return d[0].get("stories")
-            except (IndexError, KeyError):
-                data.db.remove(Q.cache_time - 86400 < floor(time()))
-        else:
-            data.db.truncate()
-        try:
-            top_stories_res = get(
-                "https://hacker-news.firebaseio.com/v0/topstories.json"
+        return [
+            story
+            for story in _get_cached_items(
+                top_stories[:STORIES_COUNT], fetch_missing=cache.is_blocking()
             )
-            if not top_stories_res.ok:
-                return []
-            top_stories: list = loads(top_stories_res.content)
-            stories = []
-            for index, item in enumerate(top_stories):
-                if index > 9:
-                    break
-                story_res = get(
-                    f"https://hacker-news.firebaseio.com/v0/item/{item}.json"
-                )
-                if not story_res.ok:
-                    continue
-                story = loads(story_res.content)
-                if story["type"] != "story":
-                    continue
-                stories.append(story)
-            data.db.insert(
-                {
-                    "top_stories": top_stories,
-                    "stories": stories,
-                    "cache_time": floor(time()),
-                }
-            )
-            return stories
-        except JSONDecodeError:
-            return []
+            if story.get("type") == "story"
+        ]
+
+    @classmethod
+    def fetch(cls):
+        """Keeps the top stories cached"""
+        cls.get_news()
 
     @classmethod
     def card(cls):
@@ -98,22 +232,218 @@ class HackerNewsModule(Module):
     @classmethod
     def display(cls):
         """Display"""
-        news = cls.get_news()
-        if not news:
+        top_stories: List[int] = cache.get(
+            "hacker_news",
+            "top_stories",
+            _get_top_stories,
+            cache.get_ttl("hacker_news", TOP_STORIES_TTL),
+            [],
+        )
+        if not top_stories:
+
+            def refreshed(module_name: str):
+                """Shows the stories once they are fetched in the background"""
+                if module_name == "hacker_news":
+                    off("hacker_news.refreshed")
+                    emit("render_module", "hacker_news")
+
+            on("hacker_news.refreshed", refreshed)
             return Padding("[b]No news today!", (1, 3))
-        news_renders = list(
-            map(
-                lambda x: RenderGroup(
-                    Text(f"{escape(x['by'])}", style="bold"),
-                    Text(f"  {escape(x['title'])}", overflow="ellipsis"),
-                    f"  {x['url']}",
-                ),
-                news,
+        page_count = ceil(len(top_stories) / PAGE_SIZE)
+        # Type: page: [(rank, story)]
+        pages: Dict[int, List[Tuple[int, dict]]] = {}
+        loading: Set[int] = set()
+        # Pages are loaded on other threads, so ``pages`` and ``loading`` are used under it
+        pages_lock = Lock()
+        # Type: comment_id: comment, of the story that is open
+        comments: Dict[int, dict] = {}
+        state: Dict[str, Any] = {
+            "page": 0,
+            "dirty": False,
+            "keys": "",
+            "story": None,
+            "offset": 0,
+        }
+        layout = Layout(name="hacker_news.main")
+
+        def load_page(page: int):
+            start, end = page * PAGE_SIZE, (page + 1) * PAGE_SIZE
+            ids = top_stories[start:end]
+            ranks = {item_id: start + index + 1 for index, item_id in enumerate(ids)}
+            try:
+                stories = [
+                    (ranks[story["id"]], story)
+                    for story in _get_cached_items(ids)
+                    if story.get("type") == "story"
+                ]
+            except BaseException:
+                with pages_lock:
+                    loading.discard(page)
+                raise
+            with pages_lock:
+                pages[page] = stories
+                loading.discard(page)
+                # Only keep the pages closest to the current one in memory
+                by_distance = sorted(list(pages), key=lambda x: abs(x - state["page"]))
+                for far_page in by_distance[MAX_PAGES:]:
+                    pages.pop(far_page, None)
+            state["dirty"] = True
+            wake()
+
+        def request_page(page: int):
+            with pages_lock:
+                if not 0 <= page < page_count or page in pages or page in loading:
+                    return
+                loading.add(page)
+            Thread(target=load_page, args=(page,), daemon=True).start()
+
+        def load_comments(story: dict):
+            def on_level(level: List[dict]):
+                # The user may have opened another story in the meantime
+                if state["story"] is story:
+                    comments.update({comment["id"]: comment for comment in level})
+                    state["dirty"] = True
+                    wake()
+
+            _get_comments(story, on_level)
+
+        def flatten_comments(kids: List[int], depth: int = 0) -> List[Tuple[int, dict]]:
+            flat: List[Tuple[int, dict]] = []
+            for kid in kids:
+                comment = comments.get(kid)
+                if not comment or comment.get("deleted") or comment.get("dead"):
+                    continue
+                flat.append((depth, comment))
+                flat.extend(flatten_comments(comment.get("kids", []), depth + 1))
+            return flat
+
+        def render_stories():
+            page = state["page"]
+            with pages_lock:
+                stories = pages.get(page)
+            if stories is None:
+                body: RenderableType = Align("[i]Loading...", "center")
+            else:
+                body = RenderGroup(
+                    *[
+                        RenderGroup(
+                            Text(f"{rank}. {escape(x.get('by', ''))}", style="bold"),
+                            Text(
+                                f"  {escape(x.get('title', ''))}", overflow="ellipsis"
+                            ),
+                            f"  {escape(x.get('url', ''))}",
+                        )
+                        for rank, x in stories
+                    ]
+                )
+            layout.update(
+                RenderGroup(
+                    f"[b u]Top posts:[/] page {page + 1} of {page_count}",
+                    Padding(body, (1, 2)),
+                    "Press [b]↓[/b] and [b]↑[/b] to change pages, "
+                    "type a post's number and press [b]ENTER[/b] to view its comments",
+                )
             )
-        )
-        return RenderGroup(
-            "[b u]Top posts:", Padding(RenderGroup(*news_renders), (1, 2))
-        )
+
+        def render_comments():
+            story = state["story"]
+            flat = flatten_comments(story.get("kids", []))
+            start, end = state["offset"], state["offset"] + COMMENTS_PAGE_SIZE
+            if not flat:
+                body: RenderableType = Align(
+                    "[i]Loading..." if story.get("kids") else "[i]No comments",
+                    "center",
+                )
+            else:
+                body = RenderGroup(
+                    *[
+                        Padding(
+                            RenderGroup(
+                                Text(comment.get("by", ""), style="bold"),
+                                Text(_comment_text(comment.get("text", ""))),
+                            ),
+                            (0, 0, 1, depth * 2),
+                        )
+                        for depth, comment in flat[start:end]
+                    ]
+                )
+            layout.update(
+                RenderGroup(
+                    Text(story.get("title", ""), style="bold underline"),
+                    Padding(body, (1, 2)),
+                    "Press [b]↓[/b] and [b]↑[/b] to scroll, "
+                    "[b]b[/b] to go back to the posts",
+                )
+            )
+
+        def render():
+            if state["story"] is None:
+                render_stories()
+            else:
+                render_comments()
+
+        def change_page(page: int):
+            state["page"] = page
+            request_page(page)
+            request_page(page + 1)
+            render()
+
+        def open_story(rank: int):
+            with pages_lock:
+                stories = pages.get(state["page"], [])
+            story = next((x for r, x in stories if r == rank), None)
+            if story is None:
+                return
+            comments.clear()
+            state["story"] = story
+            state["offset"] = 0
+            Thread(target=load_comments, args=(story,), daemon=True).start()
+            render()
+
+        def handler(key: Keystroke):
+            if state["story"] is not None:
+                if key == "b":
+                    state["story"] = None
+                    comments.clear()
+                    render()
+                elif key == "j" or key.name in ["KEY_DOWN", "KEY_PGDOWN"]:
+                    # Deleted and dead comments aren't shown, so they aren't counted
+                    shown = len(flatten_comments(state["story"].get("kids", [])))
+                    if state["offset"] + COMMENTS_PAGE_SIZE < shown:
+                        state["offset"] += COMMENTS_PAGE_SIZE
+                    render()
+                elif key == "k" or key.name in ["KEY_UP", "KEY_PGUP"]:
+                    state["offset"] = max(state["offset"] - COMMENTS_PAGE_SIZE, 0)
+                    render()
+                return
+            page = state["page"]
+            if not key.is_sequence and key.isnumeric():
+                state["keys"] += key
+            elif key.name == "KEY_ENTER":
+                if state["keys"]:
+                    open_story(int(state["keys"]))
+                state["keys"] = ""
+            elif key == "j" or key.name in ["KEY_DOWN", "KEY_PGDOWN"]:
+                change_page(min(page + 1, page_count - 1))
+            elif key == "k" or key.name in ["KEY_UP", "KEY_PGUP"]:
+                change_page(max(page - 1, 0))
+
+        def update():
+            if state["dirty"]:
+                state["dirty"] = False
+                render()
+                emit("hacker_news.update", layout)
+
+        if cache.is_blocking():
+            load_page(0)
+        else:
+            request_page(0)
+        request_page(1)
+        render()
+        on("hacker_news.keystroke", handler)
+        on("hacker_news.event_loop", update)
+
+        return layout
 
     @staticmethod
     def header():
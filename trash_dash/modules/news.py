@@ -1,17 +1,16 @@
 """News module"""
-from json import JSONDecodeError
-from math import floor
-from time import time
 from typing import List, Optional, TypedDict
 
-from requests import get
 from rich.align import Align
 from rich.console import RenderGroup
-from tinydb import Query
 
-from trash_dash.data import Data
+from trash_dash.cache import cached
+from trash_dash.http import get
 from trash_dash.module import Module, register_module
 
+# Fields of the articles that are rendered
+PROJECTION = ("title", "description", "url")
+
 
 class NewsType(TypedDict):
     title: str
@@ -22,34 +21,18 @@ class NewsType(TypedDict):
 
 class NewsModule(Module):
     @classmethod
+    @cached("news", projection=PROJECTION)
     def get_news(cls) -> Optional[List[NewsType]]:
         """Gets the latest worldwide news"""
-        data = Data("news")
-        Q = Query()
-        d = data.db.search(
-            (Q.cache_time >= (floor(time()) - 86400)) & (Q.cache_time <= floor(time()))
-        )
-        if d:
-            try:
-                return d[0].get("news")
-            except (IndexError, KeyError):
-                data.db.remove(Q.cache_time - 86400 < floor(time()))
-        else:
-            data.db.truncate()
-        try:
-            res = get("https://zh492f.deta.dev/news")
-            if not res.ok:
-                return None
-            news = res.json().get("articles")
-            data.db.insert(
-                {
-                    "news": news,
-                    "cache_time": floor(time()),
-                }
-            )
-            return news
-        except JSONDecodeError:
+        res = get("https://zh492f.deta.dev/news")
+        if not res.ok:
             return None
+        return res.json().get("articles")
+
+    @classmethod
+    def fetch(cls):
+        """Keeps the news cached"""
+        cls.get_news()
 
     @classmethod
     def today(cls):
@@ -3,14 +3,16 @@ This module contains the Today card
 
 The today card MUST NOT be imported in ``__init__.py`` in order to prevent circular import
 """
-from typing import List
+from typing import List, Tuple
 
 from rich.console import RenderGroup
 from rich.markup import escape
 from rich.padding import Padding
 from rich.panel import Panel
 
+from trash_dash import cache
 from trash_dash.events import emit, once
+from trash_dash.memo import memoized
 from trash_dash.module import Module, register_module
 from trash_dash.modules import modules
 
@@ -28,6 +30,7 @@ class TodayModule(Module):
                         to_return.append(
                             {
                                 "name": module.meta.display_name,
+                                "stale": cache.is_stale(module.meta.name),
                                 "renderable": today,
                                 "destroy_func": lambda: emit(
                                     f"{module.meta.name}.destroy"
@@ -38,14 +41,26 @@ class TodayModule(Module):
                 pass
         return to_return
 
-    @classmethod
-    def card(cls):
-        """Returns the today card"""
+    @staticmethod
+    def _render() -> Tuple[Panel, List[dict]]:
+        """Renders the today card. Returns the card and the items in it"""
         today = TodayModule._get_today()
         items = []
         for i in today:
-            items.append(Padding(f"[b u]{escape(i.get('name', 'Module'))}", (0, 1)))
-            items.append(Padding(i.get("renderable"), (0, 4)))
+            stale = " [dim](stale)" if i.get("stale") else ""
+            items.append(
+                Padding(f"[b u]{escape(i.get('name', 'Module'))}[/]{stale}", (0, 1))
+            )
+            items.append(Padding(i["renderable"], (0, 4)))
+        return Panel(RenderGroup(*items), title="Today"), today
+
+    @classmethod
+    def card(cls):
+        """Returns the today card"""
+        names = [
+            module.meta.name for module in modules.values() if module.meta.allow_today
+        ]
+        panel, today = memoized("today", "card", cls._render, names)
 
         def destroy():
             for item in today:
@@ -53,7 +68,6 @@ class TodayModule(Module):
                     item.get("destroy_func")()
 
         once("today.destroy", destroy)
-        panel = Panel(RenderGroup(*items), title="Today")
         return panel
 
 
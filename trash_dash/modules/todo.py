@@ -1,5 +1,6 @@
-from collections.abc import Callable
-from typing import Any, List, Literal, Optional, TypedDict, cast
+from bisect import bisect_left, insort
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, Dict, List, Literal, Optional, Tuple, TypedDict, cast
 
 from blessed.keyboard import Keystroke
 from rich.align import Align
@@ -71,33 +72,147 @@ class TodoType(TypedDict):
     stage: Literal["todo", "doing", "done"]
 
 
+Stage = Literal["todo", "doing", "done"]
+STAGES: Tuple[Stage, ...] = ("todo", "doing", "done")
+# Number of tasks shown in a column, the rest are counted
+MAX_SHOWN_TASKS = 50
+# Number of tasks inserted at once when importing
+IMPORT_BATCH_SIZE = 1000
+
+_todo: Optional["Todo"] = None
+
+
 class Todo:
-    data: Data
+    """
+    The tasks, indexed by stage
 
-    def __init__(self):
-        self.data = Data("todo")
+    ``Todo()`` always returns the same instance. The tasks are read once, and the indexes
+    are updated as tasks are added, moved and deleted. They are read again when changes of
+    another instance are read, as tasks added here may be renumbered then.
+    """
 
-    def add_item(self, text: str, stage: Literal["todo", "doing", "done"]):
-        todo = dict(text=text, stage=stage)
-        todo_id = self.data.db.insert(todo)
-        doc = self.data.db.get(doc_id=todo_id)
-        return self.parse(doc)
+    data: Data
+    # Type: task_id: task
+    __tasks: Dict[int, TodoType]
+    # Type: stage: IDs of the tasks in the stage, in order
+    __stages: Dict[str, List[int]]
+    # ``data.merges`` when the tasks were read
+    __merges: int
+
+    def __new__(cls):
+        global _todo
+        if _todo is None:
+            _todo = super().__new__(cls)
+            _todo.data = Data("todo", indexes=("stage",))
+            _todo.__load()
+        return _todo
+
+    def __load(self):
+        """Reads and indexes the tasks"""
+        self.__tasks = {}
+        self.__stages = {stage: [] for stage in STAGES}
+        for doc in self.data.db.all():
+            task = self.parse(doc)
+            self.__tasks[doc.doc_id] = task
+            self.__stages.setdefault(task["stage"], []).append(doc.doc_id)
+        for task_ids in self.__stages.values():
+            task_ids.sort()
+        # Reading the data may have read changes of another instance
+        self.__merges = self.data.merges
+
+    def __sync(self):
+        """Reads the tasks again if changes of another instance were read since"""
+        if self.data.merges != self.__merges:
+            self.__load()
+
+    def __index(self, todo_id: int, task: TodoType):
+        """Adds a task to the indexes"""
+        self.__tasks[todo_id] = task
+        insort(self.__stages.setdefault(task["stage"], []), todo_id)
+
+    def __unindex(self, todo_id: int) -> Optional[TodoType]:
+        """Removes a task from the indexes"""
+        task = self.__tasks.pop(todo_id, None)
+        if task is None:
+            return None
+        task_ids = self.__stages[task["stage"]]
+        index = bisect_left(task_ids, todo_id)
+        if index < len(task_ids) and task_ids[index] == todo_id:
+            del task_ids[index]
+        return task
+
+    def add_item(self, text: str, stage: Stage) -> TodoType:
+        self.__sync()
+        todo_id = self.data.db.insert(dict(text=text, stage=stage))
+        task = cast(TodoType, {"text": text, "stage": stage, "id": str(todo_id)})
+        self.__index(todo_id, task)
+        return task
+
+    def import_items(self, records: Iterable[Any]) -> int:
+        """
+        Adds tasks in batches of ``IMPORT_BATCH_SIZE``, in one transaction
+
+        :param records: The tasks. Each has a ``text``, and optionally a ``stage`` (defaults
+        to ``todo``)
+        :raises ValueError: If a task is invalid. None of the tasks are added then
+        :return: The number of added tasks
+        """
+        # Type: [(task_id, document)]
+        added: List[Tuple[int, dict]] = []
+        self.__sync()
+        with self.data.transaction():
+            batch: List[dict] = []
+            for record in records:
+                batch.append(self.__validate(record, len(added) + len(batch) + 1))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    added.extend(zip(self.data.db.insert_multiple(batch), batch))
+                    batch = []
+            if batch:
+                added.extend(zip(self.data.db.insert_multiple(batch), batch))
+        for todo_id, doc in added:
+            self.__index(
+                todo_id,
+                cast(
+                    TodoType,
+                    {"text": doc["text"], "stage": doc["stage"], "id": str(todo_id)},
+                ),
+            )
+        return len(added)
 
-    def delete_item(self, todo_id: int):
-        try:
-            self.data.db.remove(doc_ids=(todo_id,))
-        except KeyError:
-            return
+    @staticmethod
+    def __validate(record: Any, number: int) -> dict:
+        """Gets the document of a task to import"""
+        if not isinstance(record, Mapping):
+            raise ValueError(f"Task {number} is not an object")
+        text = record.get("text")
+        stage = record.get("stage") or "todo"
+        if not isinstance(text, str) or not text:
+            raise ValueError(f"Task {number} has no text")
+        if stage not in STAGES:
+            raise ValueError(f"Task {number} has an invalid stage: {stage!r}")
+        return {"text": text, "stage": stage}
+
+    def delete_item(self, todo_id: int) -> Optional[TodoType]:
+        """Deletes a task. Returns the deleted task"""
+        self.__sync()
+        if todo_id not in self.__tasks:
+            return None
+        self.data.db.remove(doc_ids=(todo_id,))
+        return self.__unindex(todo_id)
 
     def get_item(self, todo_id: int) -> Optional[Document]:
         return self.data.db.get(doc_id=todo_id)
 
-    def move_item(self, todo_id: int, stage: Literal["todo", "doing", "done"]):
-        item = self.get_item(todo_id)
-        if not item:
-            return  # type: ignore
-        item["stage"] = stage
-        self.data.db.update(item, doc_ids=(todo_id,))
+    def move_item(self, todo_id: int, stage: Stage) -> Optional[TodoType]:
+        """Moves a task to a stage. Returns the task before it was moved"""
+        self.__sync()
+        task = self.__tasks.get(todo_id)
+        if not task:
+            return None
+        self.data.db.update({"stage": stage}, doc_ids=(todo_id,))
+        self.__unindex(todo_id)
+        self.__index(todo_id, cast(TodoType, {**task, "stage": stage}))
+        return task
 
     @staticmethod
     def parse(data: Document) -> TodoType:
@@ -112,19 +227,33 @@ class Todo:
 
     @property
     def tasks(self) -> List[TodoType]:
-        return list(map(self.parse, self.data.db.all()))
+        self.__sync()
+        return [self.__tasks[todo_id] for todo_id in sorted(self.__tasks)]
+
+    def get_stage(self, stage: Stage, limit: Optional[int] = None) -> List[TodoType]:
+        """Gets the tasks in a stage, ordered by ID"""
+        self.__sync()
+        task_ids = self.__stages.get(stage, [])
+        if limit is not None:
+            task_ids = task_ids[:limit]
+        return [self.__tasks[todo_id] for todo_id in task_ids]
+
+    def count(self, stage: Stage) -> int:
+        """Counts the tasks in a stage"""
+        self.__sync()
+        return len(self.__stages.get(stage, []))
 
     @property
     def todo(self) -> List[TodoType]:
-        return list(filter(lambda x: x["stage"] == "todo", self.tasks))
+        return self.get_stage("todo")
 
     @property
     def doing(self) -> List[TodoType]:
-        return list(filter(lambda x: x["stage"] == "doing", self.tasks))
+        return self.get_stage("doing")
 
     @property
     def done(self) -> List[TodoType]:
-        return list(filter(lambda x: x["stage"] == "done", self.tasks))
+        return self.get_stage("done")
 
 
 class TodoModule(Module):
@@ -136,41 +265,44 @@ class TodoModule(Module):
         layout_prompt = Layout(prompt_layout, name="todo.prompt", size=3)
         layout.split_column(layout_tasks, layout_prompt)
 
-        def get_todos() -> RenderableType:
-            to_do = todo.todo
-            doing = todo.doing
-            done = todo.done
-            todo_r = Padding(
-                RenderGroup(
-                    *list(map(lambda x: f"[b]{x.get('id')}[/] {x.get('text')}", to_do)),
-                    Padding("Press [b]t[/] to add item", (1, 0, 0, 0)),
+        # Type: stage: (title, key that adds an item)
+        column_info = {
+            "todo": ("To Do", "t"),
+            "doing": ("Doing", "d"),
+            "done": ("Done", "n"),
+        }
+        # Type: stage: rendered column
+        columns: Dict[str, RenderableType] = {}
+
+        def render_column(stage: Stage):
+            title, add_key = column_info[stage]
+            tasks = todo.get_stage(stage, MAX_SHOWN_TASKS)
+            hidden = todo.count(stage) - len(tasks)
+            columns[stage] = Panel(
+                Padding(
+                    RenderGroup(
+                        *list(
+                            map(lambda x: f"[b]{x.get('id')}[/] {x.get('text')}", tasks)
+                        ),
+                        *([f"[i]...and {hidden} more"] if hidden > 0 else []),
+                        Padding(f"Press [b]{add_key}[/] to add item", (1, 0, 0, 0)),
+                    ),
+                    (1, 2),
                 ),
-                (1, 2),
-            )
-            doing_r = Padding(
-                RenderGroup(
-                    *list(map(lambda x: f"[b]{x.get('id')}[/] {x.get('text')}", doing)),
-                    Padding("Press [b]d[/] to add item", (1, 0, 0, 0)),
-                ),
-                (1, 2),
-            )
-            done_r = Padding(
-                RenderGroup(
-                    *list(map(lambda x: f"[b]{x.get('id')}[/] {x.get('text')}", done)),
-                    Padding("Press [b]n[/] to add item", (1, 0, 0, 0)),
-                ),
-                (1, 2),
+                title=title,
             )
+
+        def get_todos(*changed_stages: Stage) -> RenderableType:
+            """Renders the columns of the changed stages again"""
+            for stage in changed_stages:
+                if stage in column_info:
+                    render_column(stage)
             return Columns(
-                [
-                    Panel(todo_r, title="To Do"),
-                    Panel(doing_r, title="Doing"),
-                    Panel(done_r, title="Done"),
-                ],
+                [columns[stage] for stage in STAGES],
                 width=(console.width // 3) - 3,
             )
 
-        layout_tasks.update(get_todos())
+        layout_tasks.update(get_todos(*STAGES))
 
         def handler(key: Keystroke):
             global get_prompt
@@ -211,32 +343,42 @@ class TodoModule(Module):
             global get_prompt
             todo.add_item(item, stage)
             get_prompt = None
-            layout_tasks.update(get_todos())
+            layout_tasks.update(get_todos(stage))
 
         def delete_item(item: str):
             global get_prompt
             if not item.isnumeric():
                 return
-            todo.delete_item(int(item))
+            deleted = todo.delete_item(int(item))
             get_prompt = None
-            layout_tasks.update(get_todos())
+            if deleted:
+                layout_tasks.update(get_todos(deleted["stage"]))
 
         def move_item_1(payload: str):
             global get_prompt
             try:
-                item_id, stage = payload.split()
-                if not item_id.isnumeric() or stage not in ["todo", "doing", "done"]:
+                item_id, name = payload.split()
+                if not item_id.isnumeric() or name not in STAGES:
                     return
-                todo.move_item(int(item_id), stage)
+                stage = cast(Stage, name)
+                moved = todo.move_item(int(item_id), stage)
                 get_prompt = None
-                layout_tasks.update(get_todos())
+                if moved:
+                    layout_tasks.update(get_todos(moved["stage"], stage))
             except ValueError:
                 return
 
+        def refreshed(module_name: str):
+            """Renders every column again, after tasks of another instance were read"""
+            if module_name == "todo":
+                layout_tasks.update(get_todos(*STAGES))
+                emit("todo.update", layout)
+
         on("todo.keystroke", handler)
         on("todo.add", add_item)
         on("todo.delete", delete_item)
         on("todo.move", move_item_1)
+        on("todo.refreshed", refreshed)
 
         def update():
             if showing_prompt and get_prompt is not None:
@@ -252,13 +394,13 @@ class TodoModule(Module):
     @staticmethod
     def card():
         todo = Todo()
-        return RenderGroup("[b]Your tasks:", *list(map(lambda x: x["text"], todo.todo)))
+        tasks = todo.get_stage("todo", MAX_SHOWN_TASKS)
+        return RenderGroup("[b]Your tasks:", *list(map(lambda x: x["text"], tasks)))
 
     @staticmethod
     def today():
         todo = Todo()
-        tasks = [*todo.todo, *todo.doing]
-        length = len(tasks)
+        length = todo.count("todo") + todo.count("doing")
         return RenderGroup(f"[b]{length}[/] {'tasks' if length != 1 else 'task'} left!")
 
 
@@ -1,20 +1,25 @@
 """Module that shows wakatime stats"""
-from math import floor
-from time import time
 from typing import List, Optional, TypedDict, Union
 
-from requests import get
 from rich.align import Align
 from rich.columns import Columns
 from rich.console import RenderableType, RenderGroup
 from rich.padding import Padding
 from rich.panel import Panel
-from tinydb import Query
 
-from trash_dash.data import Data
+from trash_dash import cache
+from trash_dash.http import get
 from trash_dash.module import Module, register_module
 from trash_dash.settings import register
 
+# Fields of the stats that are rendered
+PROJECTION: cache.Projection = (
+    "human_readable_total",
+    "human_readable_daily_average",
+    {"editors": ("name", "text")},
+    {"languages": ("name", "text")},
+)
+
 
 class WakatimeItemType(TypedDict):
     digital: str
@@ -42,32 +47,28 @@ class WakatimeModule(Module):
     def get_wakatime_stats() -> Optional[Union[dict, WakatimeStatsType]]:
         """Gets the wakatime statistics"""
         settings = register("wakatime")
-        data = Data("wakatime")
-        Q = Query()
-        d = data.db.search(
-            (Q.cache_time >= (floor(time()) - 86400)) & (Q.cache_time <= floor(time()))
-        )
-        if d:
-            try:
-                return d[0].get("wakatime")
-            except (IndexError, KeyError):
-                data.db.remove(Q.cache_time - 86400 < floor(time()))
-        else:
-            data.db.truncate()
-        if (
-            not settings.get("username")
-            or settings.get("username") == "ENTER YOUR WAKATIME USERNAME"
-        ):
+        username = settings.get("username")
+        if not username:
             settings.set("username", "ENTER YOUR WAKATIME USERNAME")
             return None
-        res = get(
-            f"https://wakatime.com/api/v1/users/{settings.get('username')}/stats/last_7_days"
+        if username == "ENTER YOUR WAKATIME USERNAME":
+            return None
+
+        def fetch() -> Optional[WakatimeStatsType]:
+            res = get(f"https://wakatime.com/api/v1/users/{username}/stats/last_7_days")
+            if not res.ok:
+                return None
+            wakatime: WakatimeResponseType = res.json()
+            return wakatime.get("data")
+
+        return cache.get(
+            "wakatime", f"stats:{username}", fetch, default={}, projection=PROJECTION
         )
-        if not res.ok:
-            return {}
-        wakatime: WakatimeResponseType = res.json()
-        data.db.insert({"cache_time": floor(time()), "wakatime": wakatime.get("data")})
-        return wakatime.get("data")
+
+    @classmethod
+    def fetch(cls):
+        """Keeps the wakatime stats cached"""
+        cls.get_wakatime_stats()
 
     @classmethod
     def today(cls):
@@ -1,20 +1,33 @@
 """Weather module"""
-from json import JSONDecodeError
-from math import floor
-from time import time
 from typing import Optional, TypedDict
 
-from requests import get
 from rich.align import Align
 from rich.console import RenderGroup
 from rich.padding import Padding
 from rich.panel import Panel
-from tinydb import Query
 
-from trash_dash.data import Data
+from trash_dash.cache import Projection, cached
+from trash_dash.http import get
 from trash_dash.module import Module, register_module
 from trash_dash.settings import register
 
+# Fields of the weather that are rendered
+PROJECTION: Projection = (
+    {"location": ("name", "country")},
+    {
+        "current": (
+            "last_updated",
+            "temp_c",
+            "temp_f",
+            "feelslike_c",
+            "feelslike_f",
+            "humidity",
+            "cloud",
+            {"condition": ("text",)},
+        )
+    },
+)
+
 
 class WeatherLocationType(TypedDict):
     lat: float
@@ -66,37 +79,21 @@ class WeatherModule(Module):
         return None
 
     @classmethod
+    @cached("weather", projection=PROJECTION)
     def get_weather(cls) -> Optional[WeatherType]:
         """Gets the current weather from the IP"""
-        data = Data("weather")
-        Q = Query()
-        d = data.db.search(
-            (Q.cache_time >= (floor(time()) - 86400)) & (Q.cache_time <= floor(time()))
-        )
-        if d:
-            try:
-                return d[0].get("weather")
-            except (IndexError, KeyError):
-                data.db.remove(Q.cache_time - 86400 < floor(time()))
-        else:
-            data.db.truncate()
-        try:
-            ip = cls.get_ip()
-            if not ip:
-                return None
-            res = get("https://zh492f.deta.dev/weather?ip=" + ip)
-            if not res.ok:
-                return None
-            weather = res.json()
-            data.db.insert(
-                {
-                    "weather": weather,
-                    "cache_time": floor(time()),
-                }
-            )
-            return weather
-        except JSONDecodeError:
+        ip = cls.get_ip()
+        if not ip:
             return None
+        res = get("https://zh492f.deta.dev/weather?ip=" + ip)
+        if not res.ok:
+            return None
+        return res.json()
+
+    @classmethod
+    def fetch(cls):
+        """Keeps the weather cached"""
+        cls.get_weather()
 
     @classmethod
     def today(cls):
@@ -0,0 +1,76 @@
+"""
+Repaints the terminal
+
+Screens ask for a repaint with ``request``. The requests made within a frame are
+coalesced into a single repaint, at most ``max_fps`` (set in settings.toml) frames are
+drawn per second, and nothing is drawn while nothing changes.
+"""
+from time import monotonic
+from typing import Optional, Tuple
+
+from rich.console import RenderableType
+from rich.live import Live
+
+from trash_dash.console import console
+from trash_dash.settings import get_settings
+
+# Default number of frames drawn per second, at most
+DEFAULT_MAX_FPS = 10
+
+_live: Optional[Live] = None
+# The renderable that is drawn, and the one waiting for the next frame
+_shown: Optional[RenderableType] = None
+_pending: Optional[RenderableType] = None
+_last_frame = 0.0
+_size: Optional[Tuple[int, int]] = None
+
+
+def _get_frame_time() -> float:
+    """Gets the shortest seconds between two frames, from the ``max_fps`` setting"""
+    try:
+        return 1 / max(float(get_settings().get("max_fps", DEFAULT_MAX_FPS)), 1)
+    except (TypeError, ValueError):
+        return 1 / DEFAULT_MAX_FPS
+
+
+def start(live: Live, renderable: RenderableType) -> None:
+    """Draws the frames on a ``Live`` display, which shows ``renderable``"""
+    global _live, _shown, _size
+    _live = live
+    _shown = renderable
+    _size = console.size
+
+
+def request(renderable: RenderableType) -> None:
+    """Asks for the renderable to be drawn in the next frame"""
+    global _pending
+    _pending = renderable
+
+
+def get_delay() -> Optional[float]:
+    """Gets the seconds until the next frame must be drawn, or None if nothing changed"""
+    if _pending is None and console.size == _size:
+        return None
+    return max(_last_frame + _get_frame_time() - monotonic(), 0)
+
+
+def render() -> None:
+    """Draws a frame, if something changed and the last frame isn't too recent"""
+    global _shown, _pending, _last_frame, _size
+    delay = get_delay()
+    if _live is None or delay is None or delay > 0:
+        return
+    _shown = _pending or _shown
+    _pending = None
+    if _shown is None:
+        return
+    _last_frame = monotonic()
+    # The terminal is repainted when it is resized, even if nothing else changed
+    _size = console.size
+    _live.update(_shown, refresh=True)
+
+
+def stop() -> None:
+    """Stops drawing frames"""
+    global _live, _shown, _pending
+    _live = _shown = _pending = None
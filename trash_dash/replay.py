@@ -0,0 +1,58 @@
+"""
+Records HTTP responses, and replays them from a local server
+
+Set ``TRASH_DASH_RECORD`` to a folder to save every response ``trash_dash.http`` receives
+as a fixture file in it. Then serve the fixtures with ``trash_dash.replay_server``::
+
+    python -m trash_dash.replay_server FOLDER --port 8765 --latency 100 --jitter 50 --error-rate 0.1
+
+and set ``TRASH_DASH_REPLAY`` to ``http://127.0.0.1:8765`` to send every request to it
+instead of the internet. Requests that have no fixture get a ``404``.
+"""
+import json
+import os
+from base64 import b64encode
+from hashlib import sha256
+from urllib.parse import urlsplit
+
+from requests import Response
+
+RECORD_PATH = os.getenv("TRASH_DASH_RECORD")
+REPLAY_URL = os.getenv("TRASH_DASH_REPLAY")
+
+# Headers that don't describe the stored body
+_SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def get_key(url: str) -> str:
+    """Gets the fixture key of a URL, ignoring its scheme"""
+    parts = urlsplit(url)
+    return sha256(f"{parts.netloc}{parts.path}?{parts.query}".encode()).hexdigest()
+
+
+def rewrite(url: str) -> str:
+    """Points a URL to the replay server, if replaying"""
+    if not REPLAY_URL:
+        return url
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{REPLAY_URL.rstrip('/')}/{parts.netloc}{parts.path}{query}"
+
+
+def record(url: str, res: Response) -> None:
+    """Saves a response as a fixture, if recording"""
+    if not RECORD_PATH:
+        return
+    os.makedirs(RECORD_PATH, exist_ok=True)
+    fixture = {
+        "url": url,
+        "status": res.status_code,
+        "headers": {
+            key: value
+            for key, value in res.headers.items()
+            if key.lower() not in _SKIPPED_HEADERS
+        },
+        "body": b64encode(res.content).decode(),
+    }
+    with open(os.path.join(RECORD_PATH, f"{get_key(url)}.json"), "w") as f:
+        json.dump(fixture, f, indent=2)
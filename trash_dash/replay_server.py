@@ -0,0 +1,101 @@
+"""
+Local stand-in server that replays recorded HTTP responses
+
+See ``trash_dash.replay`` for how to record responses and send requests to this server.
+"""
+import json
+import os
+import random
+from argparse import ArgumentParser
+from base64 import b64decode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Optional
+
+from trash_dash.replay import get_key
+
+# Recorded headers that aren't replayed: the ones that only applied to the recorded
+# connection, and the ones the server sends itself
+_SKIPPED_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "content-encoding",
+    "content-length",
+    "date",
+    "server",
+}
+
+
+def _load(path: str, url: str) -> Optional[dict]:
+    """Loads the fixture of a URL"""
+    try:
+        with open(os.path.join(path, f"{get_key(url)}.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def serve(
+    path: str,
+    port: int = 8765,
+    latency: float = 0,
+    jitter: float = 0,
+    error_rate: float = 0,
+) -> None:
+    """
+    Serves fixtures until interrupted
+
+    :param path: Folder containing the fixtures
+    :param port: Port to listen on
+    :param latency: Milliseconds every response is delayed by
+    :param jitter: Max milliseconds added to, or removed from the latency
+    :param error_rate: Fraction of requests that get a ``503``
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sleep(max(latency + random.uniform(-jitter, jitter), 0) / 1000)
+            if random.random() < error_rate:
+                self.send_error(503, "Injected error")
+                return
+            # The path is /{host}/{path}
+            fixture = _load(path, f"//{self.path.lstrip('/')}")
+            if fixture is None:
+                self.send_error(404, "No fixture")
+                return
+            body = b64decode(fixture["body"])
+            self.send_response(fixture["status"])
+            for key, value in fixture["headers"].items():
+                if key.lower() not in _SKIPPED_HEADERS:
+                    self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving fixtures from {path} on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Serves recorded HTTP responses")
+    parser.add_argument("path", help="Folder containing the fixtures")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="In milliseconds")
+    parser.add_argument("--jitter", type=float, default=0, help="In milliseconds")
+    parser.add_argument(
+        "--error-rate", type=float, default=0, help="Fraction of requests that fail"
+    )
+    args = parser.parse_args()
+    serve(args.path, args.port, args.latency, args.jitter, args.error_rate)
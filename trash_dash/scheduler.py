@@ -0,0 +1,103 @@
+"""
+Fetches the data of modules in the background
+
+Each module's ``fetch`` method is run on a worker thread at startup, and then every
+``refresh_interval`` seconds (set in the module's settings). Fetched values are
+announced with the ``refreshed`` event, so rendering only has to read cached data.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Timer
+from typing import Any, Dict, Iterable, Optional
+
+from trash_dash import cache
+from trash_dash.module import Module
+from trash_dash.settings import get_settings
+
+# Default seconds between two fetches of a module
+DEFAULT_INTERVAL = 600
+# Number of modules that can be fetched at once
+MAX_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Type: module_name: timer of the next fetch
+_timers: Dict[str, Timer] = {}
+_lock = Lock()
+
+
+def get_interval(module_name: str) -> int:
+    """Gets the refresh interval of a module from its ``refresh_interval`` setting"""
+    module_settings = get_settings().get("module", {}).get(module_name, {})
+    try:
+        return max(int(module_settings.get("refresh_interval", DEFAULT_INTERVAL)), 1)
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL
+
+
+def _run(module: Any) -> None:
+    """Fetches a module's data, and schedules the next fetch"""
+    try:
+        with cache.fetching():
+            module.fetch()
+    finally:
+        _schedule(module, get_interval(module.meta.name))
+
+
+def _submit(module: Any) -> None:
+    """Queues a module to be fetched by the workers"""
+    with _lock:
+        if _executor is not None:
+            _executor.submit(_run, module)
+
+
+def _schedule(module: Any, delay: float) -> None:
+    """Fetches a module after ``delay`` seconds"""
+    with _lock:
+        if _executor is None:
+            return
+        previous = _timers.get(module.meta.name)
+        if previous is not None:
+            previous.cancel()
+        timer = Timer(delay, _submit, (module,))
+        timer.daemon = True
+        _timers[module.meta.name] = timer
+        timer.start()
+
+
+def _has_fetch(module: Any) -> bool:
+    """Checks if a module implements ``fetch``"""
+    return getattr(module, "fetch", Module.fetch) is not Module.fetch
+
+
+def start(modules: Iterable[Any]) -> None:
+    """Starts fetching the modules in the background"""
+    global _executor
+    with _lock:
+        _executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="fetch")
+    cache.blocking = False
+    for module in modules:
+        if _has_fetch(module):
+            _submit(module)
+
+
+def refresh(module: Any) -> None:
+    """Fetches a module now, instead of waiting for its next fetch"""
+    if not _has_fetch(module):
+        return
+    with _lock:
+        timer = _timers.pop(module.meta.name, None)
+    if timer is not None:
+        timer.cancel()
+    _submit(module)
+
+
+def stop() -> None:
+    """Stops fetching the modules"""
+    global _executor
+    with _lock:
+        for timer in _timers.values():
+            timer.cancel()
+        _timers.clear()
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    cache.blocking = True
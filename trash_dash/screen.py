@@ -1,14 +1,50 @@
 """Custom layout class"""
 
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Optional
 
 from blessed.keyboard import Keystroke
 from rich.console import RenderableType
 from rich.layout import Layout
 
-from trash_dash.events import emit
+from trash_dash.events import emit, off_all
+from trash_dash.memo import invalidate
 
-screens: Dict[str, "Screen"] = {}
+# Most screens kept, so that they can be shown again without rendering them
+MAX_SCREENS = 5
+
+# Type: name: screen, from the least to the most recently used
+screens: "OrderedDict[str, Screen]" = OrderedDict()
+
+
+def get_screen(name: str) -> Optional["Screen"]:
+    """Gets a kept screen, and marks it as the most recently used"""
+    screen = screens.get(name)
+    if screen is not None:
+        screens.move_to_end(name)
+    return screen
+
+
+def release_screen(name: str):
+    """Destroys a kept screen, and removes its event handlers"""
+    screen = screens.pop(name, None)
+    if screen is not None:
+        screen.release()
+
+
+def release_screens():
+    """Destroys every kept screen"""
+    for name in list(screens):
+        release_screen(name)
+
+
+def _keep(screen: "Screen"):
+    """Keeps a screen, releasing the least recently used ones if there are too many"""
+    # A screen replacing one with the same name takes over its event handlers
+    screens.pop(screen.name, None)
+    screens[screen.name] = screen
+    while len(screens) > MAX_SCREENS:
+        release_screen(next(iter(screens)))
 
 
 class Screen:
@@ -31,7 +67,6 @@ class Screen:
         :param body_renderable: Renderable to be put in the body layout
         """
         self.name = name
-        screens[name] = self
 
         self.layout = Layout(name=name)
         self.header_layout = Layout(header_renderable, name="header", size=3)
@@ -39,6 +74,7 @@ class Screen:
             body_renderable, name="body", ratio=2, minimum_size=25
         )
         self.layout.split_column(self.header_layout, self.body_layout)
+        _keep(self)
 
     def render_header(self, item: RenderableType):
         """
@@ -60,10 +96,23 @@ class Screen:
         """Handles key strokes"""
         emit(f"{self.name}.keystroke", key)
 
+    def show(self):
+        """Handles being shown again, after another screen was shown"""
+        emit(f"{self.name}.show")
+
     def destroy(self):
         """Handles destroy"""
         emit(f"{self.name}.destroy")
 
+    def release(self):
+        """Destroys the screen, removes its event handlers and lets go of its renderables"""
+        self.destroy()
+        off_all(f"{self.name}.")
+        # Views register their event handlers when rendered, so they're rendered again
+        invalidate(self.name)
+        self.header_layout.update("")
+        self.body_layout.update("")
+
     def event_loop(self):
         """This function should be called when the event loop runs"""
         emit(f"{self.name}.event_loop")
@@ -1,9 +1,14 @@
 """Contains methods for manipulating settings.toml"""
+import atexit
 import os
-from typing import Any
+from copy import deepcopy
+from threading import Lock, Timer
+from typing import Any, Callable, List, Optional, Set, Tuple
 
 import toml
 
+from trash_dash.files import locked, write_atomic
+
 PATH = os.path.abspath(
     os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/settings.toml")
 )
@@ -13,30 +18,215 @@ default_settings = {
     "cards": [],
     "modules": {},
 }
+# Seconds to wait for more changes before they are written to settings.toml
+WRITE_DELAY = 0.5
+# Seconds to wait before writing changes again, when settings.toml is invalid
+RETRY_DELAY = 5
+# Errors raised by ``toml`` when a file is invalid, e.g. IndexError on a truncated array
+_PARSE_ERRORS = (toml.TomlDecodeError, IndexError, ValueError)
 
+# The parsed settings, and the (mtime, size) of settings.toml when it was parsed
+_cache: Optional[Tuple[Tuple[int, int], dict]] = None
+_cache_lock = Lock()
+# Type: [(module_name, key, value)] of changes not written yet
+_pending: List[Tuple[str, str, Any]] = []
+_pending_lock = Lock()
+_timer: Optional[Timer] = None
+# The settings last seen by ``check_changes``, and the (mtime, size) of settings.toml then
+_seen: Optional[Tuple[Optional[Tuple[int, int]], dict]] = None
+_seen_lock = Lock()
 
-def get_settings() -> dict:
-    """Gets settings from settings.toml, or creates it if it doesn't exist, or is invalid"""
-    if not os.path.exists(PATH):
-        with open(PATH, "w") as f:
-            toml.dump(default_settings, f)
+
+def _stat() -> Optional[Tuple[int, int]]:
+    """Gets the (mtime, size) of settings.toml, or None if it doesn't exist"""
+    try:
+        stat = os.stat(PATH)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _update_cache(settings: dict) -> None:
+    """Caches settings that were just read from, or written to settings.toml"""
+    global _cache
+    stat = _stat()
+    with _cache_lock:
+        _cache = None if stat is None else (stat, deepcopy(settings))
+
+
+def _parse() -> Optional[dict]:
+    """
+    Gets the settings in settings.toml, creating it if it doesn't exist
+
+    The file is only parsed again when it changes. Returns None if it is invalid.
+    """
+    stat = _stat()
+    with _cache_lock:
+        if _cache is not None and stat is not None and _cache[0] == stat:
+            return deepcopy(_cache[1])
+    if stat is None:
+        write_atomic(PATH, toml.dumps(default_settings))
     # Try reading TOML and see if it is valid
     try:
         with open(PATH, "r") as f:
-            return dict(toml.load(f))
-    except toml.TomlDecodeError:
-        with open(PATH, "w") as f:
-            toml.dump(default_settings, f)
-    return {}
+            settings = dict(toml.load(f))
+    except _PARSE_ERRORS:
+        return None
+    _update_cache(settings)
+    return settings
+
+
+def _read() -> dict:
+    """
+    Gets the settings in settings.toml
+
+    If it is invalid, for example while it is being edited, the last valid settings are used.
+    """
+    settings = _parse()
+    if settings is not None:
+        return settings
+    with _cache_lock:
+        return deepcopy(_cache[1] if _cache is not None else default_settings)
+
+
+def _apply(settings: dict, changes: List[Tuple[str, str, Any]]) -> dict:
+    """Applies changes of module settings"""
+    for module_name, key, value in changes:
+        module = settings.get("module", {}).get(module_name)
+        if isinstance(module, dict):
+            module[key] = value
+    return settings
+
+
+def _modify(func: Callable[[dict], Any]) -> bool:
+    """
+    Changes settings.toml, without losing changes written by other instances in between
+
+    :return: False if settings.toml is invalid, in which case it isn't changed, so that
+    the user's edits aren't overwritten
+    """
+    with locked(PATH):
+        settings = _parse()
+        if settings is None:
+            return False
+        if func(settings) is False:
+            return True
+        stat = _stat()
+        write_atomic(PATH, toml.dumps(settings))
+        _see_own_write(stat, func)
+    _update_cache(settings)
+    return True
+
+
+def _see_own_write(
+    stat: Optional[Tuple[int, int]], func: Callable[[dict], Any]
+) -> None:
+    """
+    Applies a change written by this instance to the settings seen by ``check_changes``
+
+    That way it isn't reported as a change, while edits made before it still are. Should
+    be called with the lock of settings.toml, right after writing it.
+
+    :param stat: The (mtime, size) of settings.toml before it was written
+    :param func: The change
+    """
+    global _seen
+    with _seen_lock:
+        if _seen is None:
+            return
+        settings = deepcopy(_seen[1])
+        func(settings)
+        # If settings.toml was edited since it was last seen, it is compared again
+        _seen = (_stat() if _seen[0] == stat else None), settings
+
+
+def get_settings() -> dict:
+    """Gets settings from settings.toml, or creates it if it doesn't exist"""
+    settings = _read()
+    with _pending_lock:
+        return _apply(settings, _pending)
 
 
 def write_settings(data: dict) -> dict:
     """Writes the settings to file"""
-    with open(PATH, "w") as f:
-        toml.dump(data, f)
+
+    def replace(settings: dict) -> None:
+        settings.clear()
+        settings.update(deepcopy(data))
+
+    with locked(PATH):
+        stat = _stat()
+        write_atomic(PATH, toml.dumps(data))
+        _see_own_write(stat, replace)
+    _update_cache(data)
     return data
 
 
+def flush_settings() -> None:
+    """Writes changes made with ``_Settings.set`` to file"""
+    global _timer
+    with _pending_lock:
+        changes = _pending[:]
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if changes and not _modify(lambda settings: _apply(settings, changes)):
+        # settings.toml is being edited, write the changes once it is valid again
+        with _pending_lock:
+            _pending[:0] = changes
+            _start_timer(RETRY_DELAY)
+
+
+def _start_timer(delay: float) -> None:
+    """Flushes the changes after ``delay`` seconds. Should be called with ``_pending_lock``"""
+    global _timer
+    if _timer is None:
+        _timer = Timer(delay, flush_settings)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _set_later(module_name: str, key: str, value: Any) -> None:
+    """Queues a change, which is written along with the other changes made in ``WRITE_DELAY``"""
+    with _pending_lock:
+        _pending.append((module_name, key, value))
+        _start_timer(WRITE_DELAY)
+
+
+atexit.register(flush_settings)
+
+
+def check_changes() -> Tuple[Set[str], Set[str]]:
+    """
+    Checks if settings.toml changed since the last call. Only stats the file if it didn't.
+
+    :return: The names of the changed settings, and the names of the modules whose settings
+    changed. Both are empty on the first call.
+    """
+    global _seen
+    with _seen_lock:
+        stat = _stat()
+        if _seen is not None and _seen[0] == stat:
+            return set(), set()
+        settings = get_settings()
+        previous = _seen[1] if _seen is not None else settings
+        _seen = stat, settings
+    changed = {
+        key
+        for key in previous.keys() | settings.keys()
+        if key != "module" and previous.get(key) != settings.get(key)
+    }
+    old_modules = previous.get("module", {})
+    new_modules = settings.get("module", {})
+    changed_modules = {
+        name
+        for name in old_modules.keys() | new_modules.keys()
+        if old_modules.get(name) != new_modules.get(name)
+    }
+    return changed, changed_modules
+
+
 class _Settings:
     __name: str
 
@@ -71,16 +261,20 @@ class _Settings:
             or type(settings.get("module").get(self.name)) != dict  # type: ignore
         ):
             raise Exception("Setting not registered")
-        settings["module"][self.name][key] = value
-        write_settings(settings)
+        _set_later(self.name, key, value)
 
 
 def register(name: str):
-    """Register a module in settings"""
-    settings = get_settings()
-    if type(settings.get("module")) != dict:
-        settings["module"] = {}
-    if type(settings.get("module").get(name)) != dict:  # type: ignore
+    """Register a module in settings. settings.toml is only written if the module is missing"""
+
+    def add_module(settings: dict) -> bool:
+        if type(settings.get("module")) != dict:
+            settings["module"] = {}
+        if isinstance(settings["module"].get(name), dict):
+            return False
         settings["module"][name] = {"name": name}
-    write_settings(settings)
+        return True
+
+    if add_module(get_settings()):
+        _modify(add_module)
     return _Settings(name)
@@ -0,0 +1,48 @@
+"""
+Coalesces duplicate calls
+
+When a call with a key is already running, other callers with the same key wait for it
+and share its result, instead of running the function again.
+"""
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Dict
+
+# Type: key: future of the running call
+_calls: Dict[Hashable, Future] = {}
+_lock = Lock()
+
+
+def in_flight(key: Hashable) -> bool:
+    """Checks if a call with the key is running"""
+    with _lock:
+        return key in _calls
+
+
+def do(key: Hashable, func: Callable) -> Any:
+    """
+    Calls ``func``, or waits for the running call with the same key
+
+    :return: The result of the call. If the call raised an exception, it is raised to every
+    caller.
+    """
+    with _lock:
+        future = _calls.get(key)
+        leader = future is None
+        if future is None:
+            future = _calls[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        result = func()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _lock:
+            _calls.pop(key, None)
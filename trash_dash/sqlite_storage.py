@@ -0,0 +1,245 @@
+"""
+SQLite storage for ``Data``
+
+Documents are stored as JSON rows of a SQLite database, and only the rows that changed
+are written. Simple queries are run as SQL, so that they can use the indexes declared on
+the fields they check, instead of checking every document.
+"""
+import json
+import re
+import sqlite3
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from tinydb.storages import Storage
+
+from trash_dash.jsonl_storage import diff_tables
+
+# Fields that can be used in SQL, e.g. ``stage`` or ``cache_time``
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Type: query operation: SQL operator
+_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _get_json_path(path: Any) -> Optional[str]:
+    """Gets the JSON path of a query's path, e.g. ``$.stage``, or None if it can't be used in SQL"""
+    if not isinstance(path, tuple) or not path:
+        return None
+    if not all(isinstance(part, str) and _FIELD_RE.match(part) for part in path):
+        return None
+    return "$." + ".".join(path)
+
+
+def _is_sql_value(value: Any) -> bool:
+    """Checks if a value is compared the same way in SQL and Python"""
+    return isinstance(value, (str, int, float))
+
+
+def _get_json_types(value: Any) -> Tuple[str, ...]:
+    """
+    Gets the JSON types of the fields a value can be compared with, as in Python
+
+    Arrays and objects are text in SQL, and ``null`` is NULL, so they are never compared.
+    """
+    if isinstance(value, str):
+        return ("text",)
+    # ``True == 1`` in Python, and ``true`` is 1 in SQL
+    return ("integer", "real", "true", "false")
+
+
+def compile_query(query_hash: Any) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Compiles a TinyDB query to an SQL condition
+
+    :param query_hash: The ``_hash`` of the query
+    :return: The condition and its parameters, or None if the query can't be compiled
+    """
+    if not isinstance(query_hash, tuple) or len(query_hash) < 2:
+        return None
+    op = query_hash[0]
+    if op in ("and", "or"):
+        parts = [compile_query(part) for part in query_hash[1]]
+        if not parts or any(part is None for part in parts):
+            return None
+        sql = f" {op.upper()} ".join(f"({part[0]})" for part in parts)  # type: ignore
+        return sql, [param for part in parts for param in part[1]]  # type: ignore
+    if op == "not":
+        inner = compile_query(query_hash[1])
+        if inner is None:
+            return None
+        # Missing fields are NULL in SQL, and they don't match in TinyDB
+        return f"NOT COALESCE(({inner[0]}), 0)", inner[1]
+
+    json_path = _get_json_path(query_hash[1])
+    if json_path is None:
+        return None
+    field = f"json_extract(doc, '{json_path}')"
+    json_type = f"json_type(doc, '{json_path}')"
+    if op == "exists":
+        return f"{json_type} IS NOT NULL", []
+    if op in _OPERATORS and len(query_hash) == 3 and _is_sql_value(query_hash[2]):
+        value = query_hash[2]
+        types = ", ".join(f"'{name}'" for name in _get_json_types(value))
+        if op == "!=":
+            # Fields of other types (e.g. null) differ from the value in Python
+            return (
+                f"{json_type} IS NOT NULL AND NOT ({json_type} IN ({types}) AND {field} = ?)",
+                [value],
+            )
+        return f"{json_type} IN ({types}) AND {field} {_OPERATORS[op]} ?", [value]
+    if op == "one_of" and len(query_hash) == 3:
+        values = query_hash[2]
+        if not isinstance(values, tuple) or not all(map(_is_sql_value, values)):
+            return None
+        if not values:
+            return "0", []
+        names = {name for value in values for name in _get_json_types(value)}
+        types = ", ".join(f"'{name}'" for name in sorted(names))
+        params = ", ".join("?" for _ in values)
+        return f"{json_type} IN ({types}) AND {field} IN ({params})", list(values)
+    return None
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path: str):
+        """
+        Stores a TinyDB database in SQLite, with a row per document
+
+        :param path: Path to the database
+        """
+        self.__lock = Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA busy_timeout=5000")
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents "
+                "(tbl TEXT NOT NULL, id INTEGER NOT NULL, doc TEXT NOT NULL, PRIMARY KEY (tbl, id))"
+            )
+        # Type: table: {doc_id: doc}, as last written to the database
+        self.__written: Dict[str, Dict[str, Any]] = {}
+        self.__indexes: Set[str] = set()
+        # ``PRAGMA data_version`` when the database was last read, which changes when
+        # another instance writes to it
+        self.__data_version: Optional[int] = None
+        # Number of times changes of another instance were read
+        self.merges = 0
+
+    def __get_data_version(self) -> int:
+        """Gets ``PRAGMA data_version``, while holding the lock"""
+        return self.__connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self) -> bool:
+        """Checks if another instance wrote to the database since it was last read"""
+        with self.__lock:
+            return self.__get_data_version() != self.__data_version
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self.__lock:
+            tables = self.__read()
+        return tables or None
+
+    def __read(self) -> Dict[str, Dict[str, Any]]:
+        """Reads every table, while holding the lock"""
+        data_version = self.__get_data_version()
+        if self.__data_version is not None and data_version != self.__data_version:
+            self.merges += 1
+        self.__data_version = data_version
+        rows = self.__connection.execute(
+            "SELECT tbl, id, doc FROM documents ORDER BY tbl, id"
+        ).fetchall()
+        tables: Dict[str, Dict[str, Any]] = {}
+        written: Dict[str, Dict[str, Any]] = {}
+        for table, doc_id, doc in rows:
+            tables.setdefault(table, {})[str(doc_id)] = json.loads(doc)
+            written.setdefault(table, {})[str(doc_id)] = json.loads(doc)
+        self.__written = written
+        return tables
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Writes the documents that changed
+
+        Documents inserted both here and by another instance keep the other instance's ID,
+        and the ones inserted here get new IDs, like with the JSON storage. ``data`` then gets
+        the changes of the other instances.
+        """
+        with self.__lock:
+            base_ids = {table: set(docs) for table, docs in self.__written.items()}
+            ops = diff_tables(self.__written, data)
+            if not ops:
+                return
+            with self.__connection:
+                # Take the write lock before checking which IDs are taken
+                self.__connection.execute("BEGIN IMMEDIATE")
+                for op in ops:
+                    if op.get("drop"):
+                        self.__connection.execute(
+                            "DELETE FROM documents WHERE tbl = ?", (op["table"],)
+                        )
+                    elif op.get("remove"):
+                        self.__connection.execute(
+                            "DELETE FROM documents WHERE tbl = ? AND id = ?",
+                            (op["table"], int(op["id"])),
+                        )
+                    else:
+                        doc_id = int(op["id"])
+                        if op["id"] not in base_ids.get(op["table"], ()):
+                            doc_id = self.__get_free_id(op["table"], doc_id, data)
+                        self.__connection.execute(
+                            "INSERT OR REPLACE INTO documents (tbl, id, doc) VALUES (?, ?, ?)",
+                            (op["table"], doc_id, json.dumps(op["doc"])),
+                        )
+            if self.__get_data_version() != self.__data_version:
+                tables = self.__read()
+                # ``data`` is the cache of the middleware, so it gets the changes
+                data.clear()
+                data.update(tables)
+
+    def __get_free_id(
+        self, table: str, doc_id: int, data: Dict[str, Dict[str, Any]]
+    ) -> int:
+        """Gets the ID of a document inserted here, which is new if another instance took it"""
+        taken = self.__connection.execute(
+            "SELECT 1 FROM documents WHERE tbl = ? AND id = ?", (table, doc_id)
+        ).fetchone()
+        if taken is None:
+            return doc_id
+        (last_id,) = self.__connection.execute(
+            "SELECT MAX(id) FROM documents WHERE tbl = ?", (table,)
+        ).fetchone()
+        return max([last_id, *map(int, data.get(table, {}))]) + 1
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def add_index(self, field: str) -> None:
+        """Indexes a field, so that queries on it don't check every document"""
+        json_path = _get_json_path(tuple(field.split(".")))
+        if json_path is None:
+            raise ValueError(f"Can't index {field!r}")
+        with self.__lock:
+            if field in self.__indexes:
+                return
+            with self.__connection:
+                self.__connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "documents_{field}" '
+                    f"ON documents (tbl, json_extract(doc, '{json_path}'))"
+                )
+            self.__indexes.add(field)
+
+    def search(
+        self, table: str, condition: str, params: List[Any]
+    ) -> List[Tuple[int, dict]]:
+        """
+        Gets the documents of a table matching an SQL condition
+
+        :return: The IDs and the documents, ordered by ID
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                f"SELECT id, doc FROM documents WHERE tbl = ? AND ({condition}) ORDER BY id",
+                [table, *params],
+            ).fetchall()
+        return [(doc_id, json.loads(doc)) for doc_id, doc in rows]